@@ -42,6 +42,7 @@ class BatchDockingConfig(BaseModel):
     ligands_zip: str = Field(..., description="Uploaded ZIP filename containing ligands")
     config: GridBoxConfig
     exhaustiveness: int = Field(8, gt=0, description="Search exhaustiveness")
+    cpu: Optional[int] = Field(None, gt=0, description="CPU cores for the whole batch (default: all cores)")
 
 class GridBoxResponse(BaseModel):
     center_x: float
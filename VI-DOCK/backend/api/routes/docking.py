@@ -2,18 +2,32 @@ from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from api.models import DockingConfig, JobResponse, BatchDockingConfig
 from api.dependencies import get_project_manager, get_config_manager
 from core.docking_engine import DockingEngineFactory
+from utils.helpers import command_group, kill_command_group, release_command_group
 import uuid
 import asyncio
 import os
+import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
 
 router = APIRouter()
 
 # Simple in-memory job store
 jobs: Dict[str, dict] = {}
 
+# Seconds between cancellation checks while a batch is running
+BATCH_POLL_INTERVAL = 0.2
+# Queued batch tasks allowed per worker thread
+BATCH_QUEUE_DEPTH = 4
+# Most ligands handed to one engine process when the engine has a batch mode
+BATCH_CHUNK_SIZE = 25
+# Result files whose parsed pose scores are kept in memory
+POSE_CACHE_SIZE = 500
+
 def run_docking_task(job_id: str, config: DockingConfig, project_path: str):
     """Background task wrapper for docking."""
     # [FIX] Import from dependencies to avoid circular import with api.main
@@ -68,6 +82,12 @@ def run_docking_task(job_id: str, config: DockingConfig, project_path: str):
         # Create Engine
         engine = DockingEngineFactory.create_engine(config.engine)
         
+        # Poses show up on GET /jobs/{job_id} while the engine is still running,
+        # for engines that report scores mid-run
+        stream_kwargs = {}
+        if engine.supports_score_streaming():
+            stream_kwargs["on_score"] = jobs[job_id].setdefault("partial_scores", []).append
+        
         # Run Docking
         result = engine.run_docking(
             receptor_path,
@@ -77,7 +97,8 @@ def run_docking_task(job_id: str, config: DockingConfig, project_path: str):
             size=(config.config.size_x, config.config.size_y, config.config.size_z),
             exhaustiveness=config.exhaustiveness,
             num_modes=config.num_modes,
-            energy_range=config.energy_range
+            energy_range=config.energy_range,
+            **stream_kwargs
         )
         
         print(f"DEBUG: Docking finished. Success: {result['success']}")
@@ -156,6 +177,78 @@ def submit_docking_job(
         engine=config.engine
     )
 
+@lru_cache(maxsize=4096)
+def _ligand_cost_cached(lig_path: str, mtime_ns: int, file_size: int) -> Tuple[int, int]:
+    """Count torsion-tree branches and atom records (keyed on file stat)."""
+    with open(lig_path, 'rb') as f:
+        content = f.read()
+    branches = content.count(b"\nBRANCH")
+    atoms = content.count(b"\nATOM") + content.count(b"\nHETATM")
+    if not atoms:
+        # Not a PDB-like file (SDF/MOL2): fall back to a line count
+        atoms = content.count(b"\n")
+    return branches, atoms
+
+def _ligand_cost(lig_path: str) -> Tuple[int, int]:
+    """
+    Rough docking cost of a ligand for scheduling.
+    Vina run time grows with rotatable bonds (BRANCH records) and then with size.
+    """
+    try:
+        st = os.stat(lig_path)
+        return _ligand_cost_cached(lig_path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return 0, 0
+
+def _batch_output_path(results_dir: str, job_id: str, lig_path: str) -> str:
+    return os.path.join(results_dir, f"{job_id}_{os.path.basename(lig_path)}_out.pdbqt")
+
+def _dock_batch_task(engine, receptor_path: str, lig_paths: List[str], results_dir: str,
+                     center, size, exhaustiveness: int, cpu: int, work_root: str, job_id: str):
+    """
+    Dock one task of a batch job (runs inside the batch thread pool).
+    Returns (ligand path, result, output path) for every ligand of the task.
+    """
+    # Engine processes join the job's command group so a cancel can kill them
+    with command_group(job_id):
+        # Private scratch folder so parallel runs never share engine temp files
+        temp_dir = os.path.join(work_root, f"task_{uuid.uuid4().hex}")
+        os.makedirs(temp_dir, exist_ok=True)
+        
+        if len(lig_paths) == 1:
+            lig_path = lig_paths[0]
+            out_path = _batch_output_path(results_dir, job_id, lig_path)
+            print(f"DEBUG: Docking {os.path.basename(lig_path)}...")
+            res = engine.run_docking(
+                receptor_path,
+                lig_path,
+                out_path,
+                center=center,
+                size=size,
+                exhaustiveness=exhaustiveness,
+                cpu=cpu,
+                temp_dir=temp_dir,
+                job_id=job_id # For unique naming in RDock
+            )
+            return [(lig_path, res, out_path)]
+        
+        print(f"DEBUG: Docking {len(lig_paths)} ligands in one {engine.get_name()} run...")
+        batch_res = engine.run_docking_batch(
+            receptor_path, lig_paths, temp_dir,
+            center=center, size=size, exhaustiveness=exhaustiveness, cpu=cpu
+        )
+        
+        outcomes = []
+        for lig_path in lig_paths:
+            res = batch_res[lig_path]
+            out_path = _batch_output_path(results_dir, job_id, lig_path)
+            if res['success']:
+                # Poses land in the scratch folder; give them the same name as single runs
+                os.replace(res['output_file'], out_path)
+                res['output_file'] = out_path
+            outcomes.append((lig_path, res, out_path))
+        return outcomes
+
 def run_batch_docking_task(job_id: str, config: BatchDockingConfig, project_path: str):
     """Background task for batch docking."""
     from api.dependencies import get_project_manager
@@ -187,6 +280,9 @@ def run_batch_docking_task(job_id: str, config: BatchDockingConfig, project_path
                     
         print(f"DEBUG: Found {len(ligand_files)} ligands for batch docking.")
         
+        # Longest-first: start the flexible ligands early so they don't straggle at the end
+        ligand_files.sort(key=_ligand_cost, reverse=True)
+        
         # 3. Running Docking Loop
         results = []
         batch_results_summary = []
@@ -197,49 +293,121 @@ def run_batch_docking_task(job_id: str, config: BatchDockingConfig, project_path
         results_dir = project_path_obj / "results"
         results_dir.mkdir(exist_ok=True)
         
-        for lig_path in ligand_files:
-            lig_name = os.path.basename(lig_path)
-            out_path = results_dir / f"{job_id}_{lig_name}_out.pdbqt"
-            
-            print(f"DEBUG: Docking {lig_name}...")
+        center = (config.config.center_x, config.config.center_y, config.config.center_z)
+        size = (config.config.size_x, config.config.size_y, config.config.size_z)
+        cpu_budget = config.cpu or os.cpu_count() or 1
+        
+        # Engines with a native batch mode (Vina 1.2 --batch) dock a chunk of
+        # ligands per process, saving one engine start-up per ligand.
+        use_engine_batch = (
+            engine.supports_batch_docking()
+            and all(p.lower().endswith('.pdbqt') for p in ligand_files)
+            and len({Path(p).stem for p in ligand_files}) == len(ligand_files)
+        )
+        chunk_size = 1
+        if use_engine_batch:
+            chunk_size = max(1, min(BATCH_CHUNK_SIZE, -(-len(ligand_files) // cpu_budget)))
+        num_tasks = -(-len(ligand_files) // chunk_size)
+        task_iter = (ligand_files[i:i + chunk_size] for i in range(0, len(ligand_files), chunk_size))
+        
+        # Split the CPU budget between parallel runs; with fewer ligands than cores
+        # each Vina run gets several threads through --cpu instead of leaving cores idle.
+        max_workers = max(1, min(num_tasks, cpu_budget))
+        cpu_per_instance = max(1, cpu_budget // max_workers)
+        cancelled = False
+        
+        # One scratch root for the whole batch; workers create their own subfolder
+        work_root = extract_dir / "work"
+        work_root.mkdir(exist_ok=True)
+        
+        # Only keep a few tasks queued per worker instead of one future per ligand
+        max_in_flight = max_workers * BATCH_QUEUE_DEPTH
+        in_flight = {}
+        
+        def record_outcome(future, task):
+            """Append the results of one finished docking task."""
             try:
-                res = engine.run_docking(
-                    receptor_path,
-                    lig_path,
-                    str(out_path),
-                    center=(config.config.center_x, config.config.center_y, config.config.center_z),
-                    size=(config.config.size_x, config.config.size_y, config.config.size_z),
-                    exhaustiveness=config.exhaustiveness,
-                    temp_dir=str(extract_dir),
-                    job_id=job_id # For unique naming in RDock
-                )
-                 
+                outcomes = future.result()
+            except Exception as e:
+                for lig_path in task:
+                    lig_name = os.path.basename(lig_path)
+                    print(f"Error docking {lig_name}: {e}")
+                    results.append({"ligand": lig_name, "success": False, "error": str(e)})
+                    batch_results_summary.append({
+                         "Ligand": lig_name,
+                         "Score": "N/A",
+                         "OutputFile": None,
+                         "Status": "Error"
+                     })
+                return
+            
+            for lig_path, res, out_path in outcomes:
+                lig_name = os.path.basename(lig_path)
                 score = res.get('scores', [{}])[0].get('Affinity (kcal/mol)') if res.get('scores') else None
                 success = res['success']
                 
+                # Only the best score is kept; per-pose scores are read from
+                # output_file on demand (see get_batch_ligand_poses).
                 results.append({
                     "ligand": lig_name,
                     "success": success,
-                    "score": score
+                    "score": score,
+                    "output_file": out_path if success else None
                 })
                 
                 # Structure for ProjectManager
                 batch_results_summary.append({
                     "Ligand": lig_name,
                     "Score": score if score else "N/A",
-                    "OutputFile": str(out_path) if success else None,
+                    "OutputFile": out_path if success else None,
                     "Status": "Success" if success else "Failed"
                 })
-                 
-            except Exception as e:
-                print(f"Error docking {lig_name}: {e}")
-                results.append({"ligand": lig_name, "success": False, "error": str(e)})
-                batch_results_summary.append({
-                     "Ligand": lig_name,
-                     "Score": "N/A",
-                     "OutputFile": None,
-                     "Status": "Error"
-                 })
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while True:
+                    for task in islice(task_iter, max_in_flight - len(in_flight)):
+                        future = executor.submit(
+                            _dock_batch_task, engine, receptor_path, task, str(results_dir),
+                            center, size, config.exhaustiveness, cpu_per_instance, str(work_root), job_id
+                        )
+                        in_flight[future] = task
+                    
+                    if not in_flight:
+                        break
+                    
+                    # Wake up at least every BATCH_POLL_INTERVAL so a cancel request is
+                    # noticed promptly even while every worker is busy.
+                    done, _ = wait(in_flight, timeout=BATCH_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    
+                    for future in done:
+                        record_outcome(future, in_flight.pop(future))
+                    
+                    if jobs[job_id].get("cancel_requested"):
+                        # Drop everything still queued in one pass and kill the engine
+                        # processes already running, so the executor shuts down promptly
+                        # instead of waiting for whole chunks to finish.
+                        for future in in_flight:
+                            future.cancel()
+                        kill_command_group(job_id)
+                        cancelled = True
+                        break
+
+            # Tasks that were running when the cancel came in end during executor
+            # shutdown; keep what they produced so their poses can still be found.
+            for future, task in in_flight.items():
+                if future.done() and not future.cancelled():
+                    record_outcome(future, task)
+        finally:
+            # Clean up the scratch tree even if the loop itself failed
+            release_command_group(job_id)
+            shutil.rmtree(work_root, ignore_errors=True)
+
+        if cancelled:
+            print(f"DEBUG: Batch job {job_id} cancelled after {len(results)} ligands.")
+            jobs[job_id]["status"] = "cancelled"
+            jobs[job_id]["batch_results"] = results
+            return
 
         jobs[job_id]["status"] = "completed"
         jobs[job_id]["batch_results"] = results
@@ -343,6 +511,62 @@ def get_job_status(job_id: str):
         raise HTTPException(status_code=404, detail="Job not found")
     return jobs[job_id]
 
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Request cancellation of a running batch job."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = jobs[job_id]
+    if job.get("mode") != "batch":
+        # A single docking run is one engine process with nothing to skip
+        raise HTTPException(status_code=409, detail="Only batch jobs can be cancelled")
+    if job["status"] in ("pending", "running"):
+        job["cancel_requested"] = True
+    return job
+
+@lru_cache(maxsize=None)
+def _get_result_parser(engine_type: str):
+    """One engine instance per type, used only to parse result files."""
+    return DockingEngineFactory.create_engine(engine_type)
+
+@lru_cache(maxsize=POSE_CACHE_SIZE)
+def _load_pose_scores(engine_type: str, output_file: str, mtime_ns: int) -> List[dict]:
+    """Parse (and cache) the pose scores of one result file, keyed on its mtime."""
+    return _get_result_parser(engine_type).parse_result_file(output_file)
+
+@router.get("/jobs/{job_id}/poses/{ligand_name}")
+def get_batch_ligand_poses(job_id: str, ligand_name: str):
+    """Get all pose scores of one ligand from a batch job, parsed on request."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = jobs[job_id]
+    
+    entry = next((r for r in job.get("batch_results", []) if r["ligand"] == ligand_name), None)
+    if not entry or not entry.get("output_file"):
+        raise HTTPException(status_code=404, detail=f"No docked poses for ligand '{ligand_name}'")
+    
+    parser = _get_result_parser(job["engine"])
+    if not hasattr(parser, "parse_result_file"):
+        raise HTTPException(status_code=400, detail=f"Pose parsing not supported for engine {job['engine']}")
+    
+    output_file = entry["output_file"]
+    try:
+        mtime_ns = os.stat(output_file).st_mtime_ns
+    except OSError:
+        raise HTTPException(status_code=404, detail="Result file no longer exists")
+    
+    scores = _load_pose_scores(job["engine"], output_file, mtime_ns)
+    if not scores:
+        # An empty list would read as "docked, no poses"; the file just isn't in a format we parse
+        raise HTTPException(status_code=422, detail=f"No pose scores found in result file for '{ligand_name}'")
+    
+    return {
+        "ligand": ligand_name,
+        "output_file": output_file,
+        "scores": scores
+    }
+
 @router.get("/jobs")
 def list_jobs():
     """List all jobs."""
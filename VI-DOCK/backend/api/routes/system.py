@@ -9,7 +9,8 @@ router = APIRouter()
 @router.get("/engines")
 def list_engines():
     """List available docking engines and their status."""
-    engines = DockingEngineFactory.get_available_engines()
+    # The factory shares one read-only copy; hand out plain dicts
+    engines = [dict(engine) for engine in DockingEngineFactory.get_available_engines()]
     # Add status check?
     return engines
 
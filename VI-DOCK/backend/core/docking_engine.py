@@ -1,17 +1,63 @@
+import asyncio
 import os
 import subprocess
 import re
 import math
+import mmap
 import tempfile
 import json
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple, Optional, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Tuple, Optional, Any, Mapping
 from pathlib import Path
 
 # Removed direct import of CREATE_NO_WINDOW to avoid Windows dependency
 from utils.config import get_config_manager, OBABEL_PATH
-from utils.helpers import run_command
+from utils.helpers import run_command, run_command_async, run_command_streaming, thread_limited_env
 from .file_manager import FileManager
+from .logger import get_logger
+
+# Vina/Smina results table: a 'mode | affinity' header or the '----+' rule opens it,
+# then each row is "mode affinity rmsd_lb rmsd_ub" (Vina 1.2 prints whole-number RMSDs as "0")
+_VINA_TABLE_MARKERS = (b'mode |', b'----+')
+
+
+def _vina_table_start(buf) -> int:
+    """Offset of the line after the first results-table marker in `buf`, or -1."""
+    hits = [i for i in (buf.find(marker) for marker in _VINA_TABLE_MARKERS) if i >= 0]
+    if not hits:
+        return -1
+    eol = buf.find(b'\n', min(hits))
+    return len(buf) if eol < 0 else eol + 1
+
+
+def _parse_vina_row(line: bytes) -> Optional[Tuple[int, float, float, float]]:
+    """Parse one results-table row, or return None if the line isn't one."""
+    parts = line.split()
+    # Header, rule and log lines never start with a digit, so most of them stop here
+    if len(parts) < 4 or not parts[0].isdigit():
+        return None
+    try:
+        return int(parts[0]), float(parts[1]), float(parts[2]), float(parts[3])
+    except ValueError:
+        return None
+
+
+def _iter_vina_rows(buf):
+    """Yield (mode, affinity, rmsd_lb, rmsd_ub) for each table row of a bytes-like buffer."""
+    pos = _vina_table_start(buf)
+    if pos < 0:
+        return
+    end = len(buf)
+    while pos < end:
+        eol = buf.find(b'\n', pos)
+        if eol < 0:
+            eol = end
+        row = _parse_vina_row(buf[pos:eol])
+        if row is not None:
+            yield row
+        pos = eol + 1
 
 
 class BaseDockingEngine(ABC):
@@ -102,6 +148,31 @@ class BaseDockingEngine(ABC):
         else:
             return values[2]
     
+    def supports_batch_docking(self) -> bool:
+        """Whether run_docking_batch docks many ligands in a single engine process."""
+        return False
+    
+    def supports_score_streaming(self) -> bool:
+        """Whether run_docking accepts an on_score callback for scores printed mid-run."""
+        return False
+    
+    def run_docking_batch(self, receptor_path: str, ligand_paths: List[str], output_dir: str,
+                          center: Tuple[float, float, float], size: Tuple[float, float, float],
+                          exhaustiveness: int = 8, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """
+        Dock several ligands against one receptor.
+        Returns run_docking-style results keyed by ligand path; poses are written to
+        '<ligand stem>_out.pdbqt' inside output_dir. The default runs one engine call per ligand.
+        """
+        return {
+            ligand_path: self.run_docking(
+                receptor_path, ligand_path,
+                os.path.join(output_dir, f"{Path(ligand_path).stem}_out.pdbqt"),
+                center, size, exhaustiveness, **kwargs
+            )
+            for ligand_path in ligand_paths
+        }
+    
     def run_quick_screening(self, receptor_path: str, ligand_path: str,
                            output_path: str, center: Tuple[float, float, float],
                            size: Tuple[float, float, float]) -> Dict[str, Any]:
@@ -133,6 +204,9 @@ class VinaLikeEngine(BaseDockingEngine):
     def _get_executable_path(self) -> str:
         """Get the path to the engine executable."""
         pass
+    
+    def supports_score_streaming(self) -> bool:
+        return True
         
     def get_version(self) -> str:
         """Get engine version."""
@@ -156,16 +230,58 @@ class VinaLikeEngine(BaseDockingEngine):
 
     def run_docking(self, receptor_path: str, ligand_path: str, output_path: str,
                    center: Tuple[float, float, float], size: Tuple[float, float, float],
-                   exhaustiveness: int = 8, cwd: str = None, temp_dir: str = None, **kwargs) -> Dict[str, Any]:
-        """Run docking simulation."""
+                   exhaustiveness: int = 8, cwd: str = None, temp_dir: str = None,
+                   on_score=None, **kwargs) -> Dict[str, Any]:
+        """
+        Run docking simulation.
+        
+        If `on_score` is given, each results-table row is passed to it as soon as the
+        engine prints it, so callers can report poses before the run finishes.
+        """
         
         command = self._build_command(
             receptor_path, ligand_path, output_path,
             center, size, exhaustiveness, kwargs
         )
         
-        result = run_command(command, cwd=cwd)
+        # Keep any OpenMP/BLAS pools inside the engine to the --cpu share we were given,
+        # otherwise parallel batch runs oversubscribe the machine.
+        env = thread_limited_env(kwargs['cpu']) if kwargs.get('cpu') else None
+        if on_score:
+            result = run_command_streaming(command, self._score_line_handler(on_score), cwd=cwd, env=env)
+        else:
+            result = run_command(command, cwd=cwd, env=env)
         
+        return self._docking_result(result, output_path)
+
+    async def run_docking_many(self, receptor_path: str, ligand_paths: List[str], output_dir: str,
+                               center: Tuple[float, float, float], size: Tuple[float, float, float],
+                               exhaustiveness: int = 8, cwd: str = None, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """
+        Dock several ligands concurrently, one engine process each, without blocking the event loop.
+        
+        Results are keyed by ligand path as in run_docking_batch, and poses go to
+        '<ligand stem>_out.pdbqt' inside output_dir. A ligand whose run fails gets a
+        failed result instead of cancelling the others.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        env = thread_limited_env(kwargs['cpu']) if kwargs.get('cpu') else None
+        
+        async def dock(ligand_path: str) -> Dict[str, Any]:
+            output_path = os.path.join(output_dir, f"{Path(ligand_path).stem}_out.pdbqt")
+            command = self._build_command(receptor_path, ligand_path, output_path,
+                                          center, size, exhaustiveness, kwargs)
+            try:
+                result = await run_command_async(command, cwd=cwd, env=env)
+            except Exception as e:
+                return {'success': False, 'engine': self.get_name(), 'error': str(e)}
+            return self._docking_result(result, output_path)
+        
+        results = await asyncio.gather(*(dock(ligand_path) for ligand_path in ligand_paths))
+        return dict(zip(ligand_paths, results))
+
+    def _docking_result(self, result, output_path: str) -> Dict[str, Any]:
+        """Turn a finished engine process into run_docking's result dict."""
         if result and Path(output_path).exists():
             scores = self.parse_output(result.stdout)
             return {
@@ -195,15 +311,24 @@ class VinaLikeEngine(BaseDockingEngine):
         out_path = Path(out)
         if not out_path.parent.exists():
             out_path.parent.mkdir(parents=True, exist_ok=True)
-            
-        cx, cy, cz = center
-        sx, sy, sz = size
         
         command = [
             self.executable_path,
             "--receptor", str(receptor),
             "--ligand", str(ligand),
-            "--out", str(out),
+            "--out", str(out)
+        ]
+        command.extend(self._build_search_args(center, size, exhaustiveness, kwargs))
+        return command
+
+    def _build_search_args(self, center: Tuple[float, float, float],
+                           size: Tuple[float, float, float],
+                           exhaustiveness: int, kwargs: Dict) -> List[str]:
+        """Build the search box and sampling arguments shared by single and batch runs."""
+        cx, cy, cz = center
+        sx, sy, sz = size
+        
+        command = [
             "--center_x", f"{cx:.3f}",
             "--center_y", f"{cy:.3f}", 
             "--center_z", f"{cz:.3f}",
@@ -230,32 +355,94 @@ class VinaLikeEngine(BaseDockingEngine):
 
     def parse_output(self, output_content: str) -> List[Dict[str, Any]]:
         """Parse output to extract docking scores."""
-        scores = []
-        start_parsing = False
+        return self._parse_score_table(output_content.encode())
+
+    def _score_line_handler(self, on_score):
+        """Build a per-line stdout callback that hands results-table rows to `on_score`."""
+        engine = self.get_name()
+        in_table = False
+        
+        def handle(line: str):
+            nonlocal in_table
+            raw = line.encode()
+            if not in_table:
+                in_table = any(marker in raw for marker in _VINA_TABLE_MARKERS)
+                return
+            row = _parse_vina_row(raw)
+            if row is not None:
+                on_score(self._score_dict(row, engine))
+        
+        return handle
+
+    def parse_output_file(self, log_path: str) -> List[Dict[str, Any]]:
+        """Parse scores from a saved Vina log, matching against a memory map of the file."""
+        with open(log_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self._parse_score_table(buf)
+
+    def _parse_score_table(self, buf) -> List[Dict[str, Any]]:
+        """Extract the results table rows from a bytes-like Vina output buffer."""
+        engine = self.get_name()
+        return [self._score_dict(row, engine) for row in _iter_vina_rows(buf)]
+
+    @staticmethod
+    def _score_dict(row: Tuple[int, float, float, float], engine: str) -> Dict[str, Any]:
+        mode, affinity, rmsd_lb, rmsd_ub = row
+        return {
+            'Mode': mode,
+            'Affinity (kcal/mol)': affinity,
+            'RMSD L.B.': rmsd_lb,
+            'RMSD U.B.': rmsd_ub,
+            'Engine': engine
+        }
+
+    def parse_output_array(self, output_content: str):
+        """
+        Parse the results table into a float64 array of shape (N, 4).
+        
+        Columns are mode, affinity (kcal/mol), RMSD l.b. and RMSD u.b., the same
+        values parse_output returns, without building a dict per row. Needs NumPy.
+        """
+        import numpy as np
         
+        rows = list(_iter_vina_rows(output_content.encode()))
+        if not rows:
+            return np.empty((0, 4), dtype=np.float64)
+        return np.array(rows, dtype=np.float64)
+
+    def split_batch_output(self, output_content: str) -> List[List[Dict[str, Any]]]:
+        """Split the stdout of a batched run into one score table per docked ligand."""
+        sections = []
+        current = None
         for line in output_content.splitlines():
-            line = line.strip()
-            
+            # Every ligand's results table starts with its own 'mode | affinity' header
             if "mode |" in line and "affinity" in line:
-                start_parsing = True
-                continue
-            if "----+" in line:
-                start_parsing = True
-                continue
-                
-            if start_parsing and line:
+                current = []
+                sections.append(current)
+            if current is not None:
+                current.append(line)
+        return [self.parse_output("\n".join(section)) for section in sections]
+
+    def parse_result_file(self, output_path: str) -> List[Dict[str, Any]]:
+        """Read scores from the 'REMARK VINA RESULT' lines of a docked pose file."""
+        scores = []
+        with open(output_path, 'r') as f:
+            for line in f:
+                if not line.startswith("REMARK VINA RESULT:"):
+                    continue
                 parts = line.split()
-                if len(parts) >= 4 and parts[0].isdigit():
-                    try:
-                        scores.append({
-                            'Mode': int(parts[0]),
-                            'Affinity (kcal/mol)': float(parts[1]),
-                            'RMSD L.B.': float(parts[2]),
-                            'RMSD U.B.': float(parts[3]),
-                            'Engine': self.get_name()
-                        })
-                    except ValueError:
-                        continue
+                try:
+                    scores.append({
+                        'Mode': len(scores) + 1,
+                        'Affinity (kcal/mol)': float(parts[3]),
+                        'RMSD L.B.': float(parts[4]),
+                        'RMSD U.B.': float(parts[5]),
+                        'Engine': self.get_name()
+                    })
+                except (ValueError, IndexError):
+                    continue
         return scores
 
     def validate_parameters(self, center: Tuple[float, float, float],
@@ -428,12 +615,75 @@ class AutoDockGPUEngine(BaseDockingEngine):
 
 class VinaEngine(VinaLikeEngine):
     """AutoDock Vina docking engine."""
+    _batch_supported: Optional[bool] = None
+    
     def get_name(self) -> str:
         return "AutoDock Vina"
     
     def _get_executable_path(self) -> str:
         from utils.config import VINA_PATH
         return VINA_PATH
+    
+    def supports_batch_docking(self) -> bool:
+        """Vina 1.2+ docks many ligands per process with --batch/--dir."""
+        # The configured 'vina' may be Vina 1.1 or Smina, so ask the binary once
+        if self._batch_supported is None:
+            try:
+                result = run_command([self.executable_path, "--help"])
+                self._batch_supported = bool(result) and "--batch" in (result.stdout + result.stderr)
+            except Exception:
+                self._batch_supported = False
+        return self._batch_supported
+    
+    def run_docking_batch(self, receptor_path: str, ligand_paths: List[str], output_dir: str,
+                          center: Tuple[float, float, float], size: Tuple[float, float, float],
+                          exhaustiveness: int = 8, cwd: str = None, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Dock all PDBQT ligands in one Vina process and collect per-ligand scores."""
+        if not self.supports_batch_docking():
+            return super().run_docking_batch(receptor_path, ligand_paths, output_dir,
+                                             center, size, exhaustiveness, cwd=cwd, **kwargs)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        command = [self.executable_path, "--receptor", str(receptor_path)]
+        for ligand_path in ligand_paths:
+            command.extend(["--batch", str(ligand_path)])
+        command.extend(["--dir", str(output_dir)])
+        command.extend(self._build_search_args(center, size, exhaustiveness, kwargs))
+        
+        env = thread_limited_env(kwargs['cpu']) if kwargs.get('cpu') else None
+        run_error = None
+        result = None
+        try:
+            result = run_command(command, cwd=cwd, env=env)
+        except Exception as e:
+            # A bad ligand can fail the whole process; keep whatever poses were written
+            run_error = str(e)
+        
+        # Vina prints one table per ligand in input order; only trust that order when the
+        # run finished with a table for every ligand, otherwise read each pose file
+        tables = self.split_batch_output(result.stdout) if result else []
+        if len(tables) != len(ligand_paths):
+            tables = None
+        
+        results = {}
+        for i, ligand_path in enumerate(ligand_paths):
+            output_path = os.path.join(output_dir, f"{Path(ligand_path).stem}_out.pdbqt")
+            if os.path.exists(output_path):
+                results[ligand_path] = {
+                    'success': True,
+                    'engine': self.get_name(),
+                    'scores': tables[i] if tables else self.parse_result_file(output_path),
+                    'output_file': output_path
+                }
+            else:
+                results[ligand_path] = {
+                    'success': False,
+                    'engine': self.get_name(),
+                    'error': run_error or 'Docking failed - no output file generated',
+                    'log': result.stdout if result else '',
+                    'error_log': result.stderr if result else ''
+                }
+        return results
 
 
 class SminaEngine(VinaLikeEngine):
@@ -454,6 +704,27 @@ class SminaEngine(VinaLikeEngine):
              command.extend(["--autobox_ligand", str(kwargs['autobox_ligand'])])
         return command
 
+    def parse_result_file(self, output_path: str) -> List[Dict[str, Any]]:
+        """Read scores from the 'REMARK minimizedAffinity' lines of a Smina pose file."""
+        # Smina writes no RMSD remarks into its poses, so those columns stay empty
+        scores = []
+        with open(output_path, 'r') as f:
+            for line in f:
+                if not line.startswith("REMARK minimizedAffinity"):
+                    continue
+                parts = line.split()
+                try:
+                    scores.append({
+                        'Mode': len(scores) + 1,
+                        'Affinity (kcal/mol)': float(parts[2]),
+                        'RMSD L.B.': None,
+                        'RMSD U.B.': None,
+                        'Engine': self.get_name()
+                    })
+                except (ValueError, IndexError):
+                    continue
+        return scores
+
 
 class GninaEngine(VinaLikeEngine):
     """Gnina docking engine (Deep Learning) via WSL."""
@@ -464,6 +735,13 @@ class GninaEngine(VinaLikeEngine):
         # For WSL, we assume 'gnina' is in the path or we use a specific path
         return "gnina"
 
+    # Gnina is built on Smina and annotates its poses the same way
+    parse_result_file = SminaEngine.parse_result_file
+
+    def supports_score_streaming(self) -> bool:
+        # run_docking is overridden (WSL/native paths) and doesn't take on_score
+        return False
+
     def run_docking(self, receptor_path: str, ligand_path: str, output_path: str,
                    center: Tuple[float, float, float], size: Tuple[float, float, float],
                    exhaustiveness: int = 8, cwd: str = None, temp_dir: str = None, **kwargs) -> Dict[str, Any]:
@@ -593,6 +871,10 @@ class QuickVinaEngine(VinaLikeEngine):
                  return qvina_Linux
         return path
 
+    def supports_score_streaming(self) -> bool:
+        # The WSL fallback below runs its own command and doesn't take on_score
+        return False
+
     def run_docking(self, receptor_path: str, ligand_path: str, output_path: str,
                    center: Tuple[float, float, float], size: Tuple[float, float, float],
                    exhaustiveness: int = 8, cwd: str = None, temp_dir: str = None, **kwargs) -> Dict[str, Any]:
@@ -1033,16 +1315,9 @@ class LeDockEngine(BaseDockingEngine):
                 # This is more reliable than relying on subprocess cwd propagation
                 command = ["wsl", "--cd", temp_dir, wsl_binary, "dock.in"]
                 
-                # [DEBUG] Log the command
-                try:
-                    debug_log = r"C:\Users\user\.gemini\antigravity\brain\67679a53-90aa-4c37-a49a-d06e7396b911\ledock_debug.log"
-                    with open(debug_log, "a") as f:
-                        f.write(f"\n[{os.path.basename(ligand_path)}] Starting LeDock...\n")
-                        f.write(f"Temp Dir: {temp_dir}\n")
-                        f.write(f"Command: {command}\n")
-                        f.write(f"Parameters: Center={center}, Size={size}\n")
-                except:
-                    pass
+                logger = get_logger()
+                logger.debug(f"[{os.path.basename(ligand_path)}] Starting LeDock in {temp_dir}: "
+                             f"{command} (Center={center}, Size={size})")
                 
                 # We run wsl command, but we need to be careful about paths in dock.in
                 # dock.in created by python has Windows paths? No, we used relative paths "receptor.pdb", "ligand.mol2"
@@ -1051,14 +1326,9 @@ class LeDockEngine(BaseDockingEngine):
                 # [TIMEOUT] LeDock sometimes stalls on WSL. Cap at 10 minutes.
                 result = run_command(command, cwd=temp_dir, timeout=600)
                 
-                # [DEBUG] Log result
-                try:
-                    with open(debug_log, "a") as f:
-                        f.write(f"Exit Code: {result.returncode}\n")
-                        f.write(f"STDOUT:\n{result.stdout}\n")
-                        f.write(f"STDERR:\n{result.stderr}\n{'-'*50}\n")
-                except:
-                    pass
+                if result:
+                    logger.debug(f"LeDock exit code {result.returncode}\n"
+                                 f"STDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}")
             else:
                 # Windows GUI version
                 # We cannot automate this in background.
@@ -1113,13 +1383,8 @@ class LeDockEngine(BaseDockingEngine):
                 }
                 
         except Exception as e:
-            try:
-                debug_log = r"C:\Users\user\.gemini\antigravity\brain\67679a53-90aa-4c37-a49a-d06e7396b911\ledock_debug.log"
-                with open(debug_log, "a") as f:
-                    f.write(f"\n[CRITICAL ERROR] LeDock Exception: {str(e)}\n")
-            except:
-                pass
-                
+            get_logger().error(f"LeDock failed for {os.path.basename(ligand_path)}: {e}")
+            
             return {
                 'success': False,
                 'engine': self.get_name(),
@@ -1179,6 +1444,15 @@ class PlantsEngine(BaseDockingEngine):
     def validate_parameters(self, center: Tuple[float, float, float], size: Tuple[float, float, float]) -> bool:
         return True
 
+def _freeze(value: Any) -> Any:
+    """Read-only copy of nested dicts/lists: MappingProxyType and tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 class DockingEngineFactory:
     """Factory class for creating docking engine instances."""
     
@@ -1207,8 +1481,10 @@ class DockingEngineFactory:
             raise ValueError(f"Unknown engine type: {engine_type}")
 
     @staticmethod
-    def get_available_engines() -> List[Dict[str, str]]:
-        return [
+    @lru_cache(maxsize=None)
+    def get_available_engines() -> Tuple[Mapping[str, str], ...]:
+        # Static metadata: built once and returned read-only, since every caller shares it
+        return _freeze([
             {"id": "vina", "name": "AutoDock Vina", "description": "Standard Vina docking engine"},
             {"id": "autodock_gpu", "name": "AutoDock-GPU", "description": "High-performance GPU docking"},
             {"id": "smina", "name": "Smina", "description": "Vina fork with better scoring/minimization"},
@@ -1219,10 +1495,11 @@ class DockingEngineFactory:
             {"id": "ledock", "name": "LeDock", "description": "Fast and accurate docking (Windows)"},
 
             {"id": "plants", "name": "PLANTS", "description": "Ant Colony Optimization docking"}
-        ]
+        ])
     
     @staticmethod
-    def get_engine_info(engine_type: str) -> Dict[str, str]:
+    @lru_cache(maxsize=None)
+    def get_engine_info(engine_type: str) -> Mapping[str, Any]:
         """Get information about a specific docking engine."""
         # The original create_engine signature was:
         # create_engine(engine_type: str = "vina", config_manager=None, file_manager=None)
@@ -1240,13 +1517,14 @@ class DockingEngineFactory:
         # when only metadata (like name, version) is needed, without a real executable.
         # For now, passing a placeholder string for executable_path.
         engine = DockingEngineFactory.create_engine(engine_type, "dummy_path")
-        return {
+        # Cached per engine type (no real executable is involved), so freeze it for sharing
+        return _freeze({
             'name': engine.get_name(),
             'version': engine.get_version(),
             'supported_formats': engine.get_supported_formats(),
             'default_parameters': engine.get_default_parameters(),
             'description': DockingEngineFactory._get_engine_description(engine_type)
-        }
+        })
     
     @staticmethod
     def _get_engine_description(engine_type: str) -> str:
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import tempfile
 import shutil
 from typing import List, Optional, Tuple, Dict, Any
@@ -7,6 +8,16 @@ from pathlib import Path
 from utils.config import OBABEL_PATH, get_config_manager
 from utils.helpers import run_command
 
+# Prepared receptors, shared across projects and process restarts. Kept in the user's
+# own cache folder (never the shared temp dir, where anyone could plant a file under a
+# predictable name) and trimmed to the most recently used entries.
+if os.name == 'nt':
+    _USER_CACHE_ROOT = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r"~\AppData\Local")
+else:
+    _USER_CACHE_ROOT = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache")
+RECEPTOR_CACHE_DIR = os.path.join(_USER_CACHE_ROOT, "simdock", "receptors")
+RECEPTOR_CACHE_MAX_ENTRIES = 200
+
 
 class FileManager:
     """Centralized manager for all file operations and conversions."""
@@ -30,6 +41,94 @@ class FileManager:
     def prepare_receptor(self, receptor_path: str, output_dir: str, 
                         remove_water: bool = True, remove_hetatm: bool = True) -> Tuple[Optional[str], List[str]]:
         """Prepare receptor file for docking by converting to PDBQT format. Returns (path, log_steps)."""
+        output_path = os.path.join(output_dir, f"{Path(receptor_path).stem}_receptor.pdbqt")
+        
+        # The same structure uploaded or fetched again reuses the earlier conversion.
+        # pybel output is preferred; if pybel failed on this input before, the
+        # obabel fallback's output is reused instead of failing over again.
+        cache_paths = self._receptor_cache_paths(receptor_path, remove_water, remove_hetatm)
+        for cache_path in cache_paths.values():
+            if os.path.exists(cache_path):
+                try:
+                    shutil.copyfile(cache_path, output_path)
+                    os.utime(cache_path)  # mark as recently used for pruning
+                    return output_path, ["INITIALIZING_PREP", "LOADED_FROM_CACHE", "PREP_COMPLETE"]
+                except OSError:
+                    pass
+        
+        prepared_path, steps = self._convert_receptor(receptor_path, output_dir, remove_water, remove_hetatm)
+        
+        # Store under the method that actually produced the file; only the obabel path validates input
+        used_pybel = self.has_bindings and "VALIDATING_INPUT" not in steps
+        cache_path = cache_paths.get("pybel" if used_pybel else "obabel")
+        if prepared_path and cache_path:
+            try:
+                # Write under a name unique to this writer first, so neither a concurrent
+                # reader nor another thread preparing the same receptor sees half a file
+                fd, partial_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(cache_path))
+                try:
+                    with os.fdopen(fd, 'wb') as dst, open(prepared_path, 'rb') as src:
+                        shutil.copyfileobj(src, dst)
+                    os.replace(partial_path, cache_path)
+                except BaseException:
+                    os.unlink(partial_path)
+                    raise
+                self._prune_receptor_cache()
+            except OSError as e:
+                print(f"[WARNING] Could not cache prepared receptor: {e}")
+        
+        return prepared_path, steps
+    
+    @staticmethod
+    def _receptor_cache_dir() -> Optional[str]:
+        """Create the receptor cache folder if needed; None if it can't be trusted."""
+        try:
+            os.makedirs(RECEPTOR_CACHE_DIR, mode=0o700, exist_ok=True)
+            if os.name != 'nt':
+                # Only use a folder that is ours and that nobody else can write into
+                st = os.stat(RECEPTOR_CACHE_DIR)
+                if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                    return None
+        except OSError:
+            return None
+        return RECEPTOR_CACHE_DIR
+    
+    @staticmethod
+    def _prune_receptor_cache():
+        """Drop the least recently used cache entries beyond RECEPTOR_CACHE_MAX_ENTRIES."""
+        with os.scandir(RECEPTOR_CACHE_DIR) as it:
+            entries = [(e.stat().st_mtime, e.path) for e in it if e.name.endswith(".pdbqt")]
+        if len(entries) <= RECEPTOR_CACHE_MAX_ENTRIES:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - RECEPTOR_CACHE_MAX_ENTRIES]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    def _receptor_cache_paths(self, receptor_path: str, remove_water: bool,
+                              remove_hetatm: bool) -> Dict[str, str]:
+        """Cache file per usable preparation method, keyed on the receptor's content and the options."""
+        try:
+            with open(receptor_path, 'rb') as f:
+                content = hashlib.blake2b(f.read(), digest_size=16)
+        except OSError:
+            return {}
+        cache_dir = self._receptor_cache_dir()
+        if not cache_dir:
+            return {}
+        # pybel and obabel produce slightly different PDBQT, so the method is part of the key
+        paths = {}
+        for method in (("pybel", "obabel") if self.has_bindings else ("obabel",)):
+            digest = content.copy()
+            digest.update(f"|{method}|{remove_water}|{remove_hetatm}".encode())
+            paths[method] = os.path.join(cache_dir, f"{digest.hexdigest()}.pdbqt")
+        return paths
+    
+    def _convert_receptor(self, receptor_path: str, output_dir: str,
+                          remove_water: bool, remove_hetatm: bool) -> Tuple[Optional[str], List[str]]:
+        """Convert a receptor to PDBQT with pybel, falling back to the obabel executable."""
         steps = ["INITIALIZING_PREP"]
         
         # Method 1: Fast In-Memory (if available)
@@ -1,11 +1,35 @@
+import heapq
 import json
+import os
 import shutil
 import uuid
+import zipfile
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 from pathlib import Path
 from .database_manager import DatabaseManager
 
+# Folders created inside every new project
+PROJECT_SUBDIRS = ('receptors', 'ligands', 'results', 'docking_runs', 'temp', 'backups')
+
+# Backup files below this size are stored uncompressed
+BACKUP_STORE_LIMIT = 1 << 20
+
+# orjson is optional; both paths write the same UTF-8 bytes with 2-space
+# indentation and stringify non-str keys
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    _loads = json.loads
+
 
 class ProjectManager:
     """
@@ -40,18 +64,9 @@ class ProjectManager:
             # Create main project folder
             project_path.mkdir(parents=True, exist_ok=True)
             
-            # Create subdirectories
-            subdirs = [
-                'receptors',
-                'ligands',
-                'results',
-                'docking_runs',
-                'temp',
-                'backups'
-            ]
-            
-            for subdir in subdirs:
-                (project_path / subdir).mkdir(exist_ok=True)
+            # Create subdirectories (the folder name is unique, so they can't exist yet)
+            for subdir in PROJECT_SUBDIRS:
+                os.mkdir(project_path / subdir)
             
             # Initialize project data
             self.project_data = {
@@ -106,8 +121,7 @@ class ProjectManager:
             if not project_file.exists():
                 raise FileNotFoundError(f"Project file not found: {project_file}")
             
-            with open(project_file, 'r') as f:
-                self.project_data = json.load(f)
+            self.project_data = _loads(project_file.read_bytes())
             
             self.current_project_path = project_path_obj
             
@@ -308,8 +322,7 @@ class ProjectManager:
                 session_meta_data['last_results'] = top_results
             
             session_file = session_folder / 'session.json'
-            with open(session_file, 'w') as f:
-                json.dump(session_meta_data, f, indent=4)
+            session_file.write_bytes(_dumps(session_meta_data))
             
             # Add to project data
             session_info = {
@@ -391,21 +404,24 @@ class ProjectManager:
         
         return summary
     
-    def backup_project(self) -> str:
-        """Create a backup of the entire project."""
+    def backup_project(self, compression: Optional[int] = None) -> str:
+        """
+        Create a backup of the entire project.
+        
+        Args:
+            compression: zipfile compression method for every file; by default
+                small files are stored and larger ones deflated at the fastest level
+        """
         if not self.current_project_path:
             raise Exception("No project loaded")
         
         try:
             backup_time = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"project_backup_{backup_time}"
-            backup_path = self.current_project_path / 'backups' / backup_name
+            zip_path = self.current_project_path / 'backups' / f"{backup_name}.zip"
             
             # Create zip of entire project
-            # shutil.make_archive expects base_name (without extension) and root_dir
-            shutil.make_archive(str(backup_path), 'zip', self.current_project_path)
-            
-            zip_path = Path(f"{backup_path}.zip")
+            self._write_backup_archive(zip_path, compression)
             
             # Add backup info to project
             backup_info = {
@@ -426,13 +442,34 @@ class ProjectManager:
         except Exception as e:
             raise Exception(f"Failed to create backup: {e}")
     
+    def _write_backup_archive(self, zip_path: Path, compression: Optional[int] = None):
+        """Zip the project folder into zip_path, skipping the archive itself."""
+        root = str(self.current_project_path)
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            for dirpath, dirnames, filenames in os.walk(root):
+                rel_dir = os.path.relpath(dirpath, root)
+                if rel_dir != '.':
+                    # Keep empty folders, as shutil.make_archive did
+                    archive.write(dirpath, rel_dir)
+                for filename in filenames:
+                    file_path = os.path.join(dirpath, filename)
+                    if file_path == str(zip_path):
+                        continue
+                    method = compression
+                    if method is None:
+                        # PDB/PDBQT-sized files gain little from deflate; only spend CPU on large ones
+                        small = os.path.getsize(file_path) < BACKUP_STORE_LIMIT
+                        method = zipfile.ZIP_STORED if small else zipfile.ZIP_DEFLATED
+                    level = 1 if method == zipfile.ZIP_DEFLATED else None
+                    archive.write(file_path, os.path.relpath(file_path, root),
+                                  compress_type=method, compresslevel=level)
+    
     def _save_project_file(self):
         """Save project.json file."""
         if not self.current_project_path:
             return
         project_file = self.current_project_path / 'project.json'
-        with open(project_file, 'w') as f:
-            json.dump(self.project_data, f, indent=4)
+        project_file.write_bytes(_dumps(self.project_data))
     
     def _update_paths_to_relative(self):
         """Convert absolute paths to relative paths for storage."""
@@ -511,8 +548,7 @@ class ProjectManager:
     def _export_to_json(self, export_path: Path):
         """Export project data to JSON format."""
         export_file = export_path / 'project_export.json'
-        with open(export_file, 'w') as f:
-            json.dump(self.project_data, f, indent=4)
+        export_file.write_bytes(_dumps(self.project_data))
     
     def _export_to_excel(self, export_path: Path):
         """Export project data to Excel format."""
@@ -562,19 +598,36 @@ class ProjectBrowser:
         Returns:
             List of project information dictionaries
         """
+        projects = ProjectBrowser._scan_projects(projects_directory)
+        
+        # Sort by modification time (newest first)
+        projects.sort(key=ProjectBrowser._modified_key, reverse=True)
+        
+        return projects
+    
+    @staticmethod
+    def _modified_key(project_info: Dict[str, Any]) -> str:
+        """Sort key: ISO modification timestamp of a project."""
+        return project_info.get('modified', '')
+    
+    @staticmethod
+    def _scan_projects(projects_directory: Union[str, Path]) -> List[Dict[str, Any]]:
+        """Read project info for every project folder, in directory order."""
         projects = []
-        projects_dir = Path(projects_directory)
         
-        if not projects_dir.exists():
+        try:
+            entries = os.scandir(projects_directory)
+        except OSError:
             return projects
         
-        for item_path in projects_dir.iterdir():
-            project_file = item_path / 'project.json'
-            
-            if item_path.is_dir() and project_file.exists():
+        with entries:
+            for entry in entries:
+                # is_dir() uses the type cached by scandir, so no extra stat per entry
+                if not entry.is_dir():
+                    continue
+                item_path = Path(entry.path)
                 try:
-                    with open(project_file, 'r') as f:
-                        project_data = json.load(f)
+                    project_data = _loads((item_path / 'project.json').read_bytes())
                     
                     project_info = {
                         'name': project_data.get('project_info', {}).get('name', item_path.name),
@@ -592,9 +645,6 @@ class ProjectBrowser:
                     # Skip projects that can't be read
                     continue
         
-        # Sort by modification time (newest first)
-        projects.sort(key=lambda x: x.get('modified', ''), reverse=True)
-        
         return projects
     
     @staticmethod
@@ -609,5 +659,6 @@ class ProjectBrowser:
         Returns:
             List of recent project information
         """
-        all_projects = ProjectBrowser.list_projects(projects_directory)
-        return all_projects[:limit]
\ No newline at end of file
+        # Partial selection instead of sorting every project just to keep a few
+        all_projects = ProjectBrowser._scan_projects(projects_directory)
+        return heapq.nlargest(limit, all_projects, key=ProjectBrowser._modified_key)
\ No newline at end of file
@@ -1,10 +1,12 @@
 import os
 import sys
-import urllib.request
 import zipfile
-import shutil
-import ssl
-import subprocess
+import json
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
+from urllib3.util import Retry
 
 # Configuration
 BIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
@@ -17,6 +19,50 @@ URLS = {
     "vina_gpu_kernel": "https://github.com/DeltaGroupNJUPT/Vina-GPU-2.1/raw/main/Vina-GPU-2.1/Vina-GPU-2.1/Kernel2_Opt.bin"
 }
 
+# Size of every completed download, so a later run notices a file that was cut short
+# or rewritten since. Sizes only: this is not an integrity check against content that
+# was already corrupt or tampered with when it was downloaded.
+MANIFEST_PATH = os.path.join(BIN_DIR, ".downloads.json")
+_manifest_lock = threading.Lock()
+
+# User-Agent to avoid 403s
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+DOWNLOAD_CHUNK = 1 << 20
+
+# Shared connection pool: downloads from the same host reuse one TLS connection,
+# and transient failures are retried here instead of shelling out to curl.
+# SSL verification is bypassed for legacy servers.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+_POOL = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=8,
+    retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)),
+    cert_reqs='CERT_NONE',
+    assert_hostname=False
+)
+
+# Setup steps run concurrently; each buffers its messages and flushes them
+# as one block so the console output of different engines doesn't interleave.
+_output = threading.local()
+_print_lock = threading.Lock()
+
+def _log(message):
+    buffer = getattr(_output, "lines", None)
+    if buffer is None:
+        print(message)
+    else:
+        buffer.append(message)
+
+def _run_step(step):
+    _output.lines = []
+    try:
+        step()
+    finally:
+        lines, _output.lines = _output.lines, None
+        with _print_lock:
+            for line in lines:
+                print(line)
+
 def setup_bin_dir():
     if not os.path.exists(BIN_DIR):
         os.makedirs(BIN_DIR)
@@ -24,153 +70,193 @@ def setup_bin_dir():
     else:
         print(f"[OK] Bin directory exists: {BIN_DIR}")
 
+@lru_cache(maxsize=None)
+def _bin_index(subdir=""):
+    """Map lower-cased file name -> size for one directory under BIN_DIR, scanned once."""
+    try:
+        with os.scandir(os.path.join(BIN_DIR, subdir)) as entries:
+            return {e.name.lower(): e.stat().st_size for e in entries if e.is_file()}
+    except OSError:
+        return {}
+
+def _bin_exists(name, subdir=""):
+    return name.lower() in _bin_index(subdir)
+
+def _bin_size(name, subdir=""):
+    return _bin_index(subdir).get(name.lower(), 0)
+
+def _ledock_installed():
+    return _bin_size("ledock.exe") > 1000 or _bin_size("LeDock.exe", "ledock") > 1000
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'rb') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _record_download(dest_path):
+    with _manifest_lock:
+        manifest = _load_manifest()
+        manifest[os.path.basename(dest_path)] = {"size": os.path.getsize(dest_path)}
+        with open(MANIFEST_PATH, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+def _download_complete(dest_path):
+    """
+    True if dest_path exists and, when we downloaded it ourselves, still has the size
+    recorded at the end of that download. Files placed by hand (or fetched before the
+    manifest existed) have no record and are accepted as they are.
+    """
+    try:
+        size = os.path.getsize(dest_path)
+    except OSError:
+        return False
+    entry = _load_manifest().get(os.path.basename(dest_path))
+    return entry is None or size == entry.get("size")
+
 def download_file(url, dest_path):
-    print(f"Downloading {os.path.basename(dest_path)} from {url}...")
+    _log(f"Downloading {os.path.basename(dest_path)} from {url}...")
     try:
-        # Bypass SSL verification for legacy servers
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        
-        # User-Agent to avoid 403s
-        req = urllib.request.Request(
-            url, 
-            data=None, 
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
-        
-        with urllib.request.urlopen(req, context=ctx) as response, open(dest_path, 'wb') as out_file:
-            shutil.copyfileobj(response, out_file)
-        print(f"[OK] Downloaded to {dest_path}")
+        # enforce_content_length makes a cut-off transfer raise instead of passing as complete
+        response = _POOL.request('GET', url, preload_content=False, enforce_content_length=True,
+                                 headers={'User-Agent': USER_AGENT})
+        try:
+            if response.status != 200:
+                raise IOError(f"HTTP {response.status}")
+            # Stream into a side file so a failed transfer never leaves a partial
+            # file under the real name, where it would pass for a manual install
+            partial_path = dest_path + ".part"
+            try:
+                with open(partial_path, 'wb') as out_file:
+                    for chunk in response.stream(DOWNLOAD_CHUNK):
+                        out_file.write(chunk)
+                os.replace(partial_path, dest_path)
+            except BaseException:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+        finally:
+            response.release_conn()
+        _record_download(dest_path)
+        _log(f"[OK] Downloaded to {dest_path}")
         return True
     except Exception as e:
-        print(f"[WARNING] Python download failed: {e}")
-        print("Retrying with curl...")
-        try:
-            # Use curl.exe explicitly to avoid PowerShell alias issues
-            subprocess.run(["curl.exe", "-L", "-o", dest_path, url], check=True)
-            print(f"[OK] Downloaded to {dest_path} (via curl)")
-            return True
-        except Exception as e2:
-            print(f"[ERROR] Failed to download with curl: {e2}")
-            return False
+        _log(f"[ERROR] Failed to download: {e}")
+        return False
 
 def setup_vina():
     # Vina is now handled by Smina fallback or manual install
     vina_exe = os.path.join(BIN_DIR, "vina.exe")
-    if os.path.exists(vina_exe):
-        print(f"[OK] AutoDock Vina found at {vina_exe}")
+    if _bin_exists("vina.exe"):
+        _log(f"[OK] AutoDock Vina found at {vina_exe}")
     else:
-        print("[INFO] AutoDock Vina not found. VI DOCK will use Smina (compatible) if available.")
+        _log("[INFO] AutoDock Vina not found. VI DOCK will use Smina (compatible) if available.")
 
 def setup_qvina():
     # QuickVina is now handled by manual install
     qvina_exe = os.path.join(BIN_DIR, "qvina.exe")
-    if os.path.exists(qvina_exe):
-        print(f"[OK] QuickVina 2 found at {qvina_exe}")
+    if _bin_exists("qvina.exe"):
+        _log(f"[OK] QuickVina 2 found at {qvina_exe}")
     else:
-        print("[INFO] QuickVina 2 not found (Manual install required).")
+        _log("[INFO] QuickVina 2 not found (Manual install required).")
 
 def setup_ad4():
     installer_path = os.path.join(BIN_DIR, "autodock_installer.exe")
-    if os.path.exists(installer_path):
-        print(f"[OK] AutoDock 4 Installer found at {installer_path}")
+    if _download_complete(installer_path):
+        _log(f"[OK] AutoDock 4 Installer found at {installer_path}")
     else:
-        print("Downloading AutoDock 4 Installer...")
+        if _bin_exists("autodock_installer.exe"):
+            _log("[WARNING] Existing AutoDock 4 Installer is incomplete (size differs from the download record).")
+        _log("Downloading AutoDock 4 Installer...")
         download_file(URLS["ad4_installer"], installer_path)
-        print("[INFO] Please run 'autodock_installer.exe' manually to install AutoDock 4.")
+        _bin_index.cache_clear()
+        _log("[INFO] Please run 'autodock_installer.exe' manually to install AutoDock 4.")
 
 def setup_ledock():
     # Check both single file and folder
-    ledock_exe = os.path.join(BIN_DIR, "ledock.exe")
-    ledock_folder_exe = os.path.join(BIN_DIR, "ledock", "LeDock.exe")
-    
-    if (os.path.exists(ledock_exe) and os.path.getsize(ledock_exe) > 1000) or \
-       (os.path.exists(ledock_folder_exe) and os.path.getsize(ledock_folder_exe) > 1000):
-        print(f"[OK] LeDock found.")
+    if _ledock_installed():
+        _log(f"[OK] LeDock found.")
     else:
-        print("[INFO] LeDock not found (Manual install required).")
+        _log("[INFO] LeDock not found (Manual install required).")
 
 def setup_vina_gpu():
     vina_gpu_exe = os.path.join(BIN_DIR, "vina_gpu.exe")
-    if os.path.exists(vina_gpu_exe) and os.path.getsize(vina_gpu_exe) > 1000:
-        print(f"[OK] Vina-GPU+ found at {vina_gpu_exe}")
+    if _bin_size("vina_gpu.exe") > 1000:
+        _log(f"[OK] Vina-GPU+ found at {vina_gpu_exe}")
     else:
-        print("[INFO] Vina-GPU+ not found (Manual install required).")
+        _log("[INFO] Vina-GPU+ not found (Manual install required).")
 
 def setup_plants():
     plants_exe = os.path.join(BIN_DIR, "plants.exe")
-    if os.path.exists(plants_exe):
-        print(f"[OK] PLANTS found at {plants_exe}")
+    if _bin_exists("plants.exe"):
+        _log(f"[OK] PLANTS found at {plants_exe}")
     else:
-        print("[INFO] PLANTS requires manual installation (License restricted).")
+        _log("[INFO] PLANTS requires manual installation (License restricted).")
+
+# Static part of the summary, written in one go
+_INSTRUCTIONS = """
+=== Manual Installation Required ===
+The following engines require manual download due to license/hosting restrictions:
+
+1. LeDock
+   - Download 'ledock_win32.exe' from: http://www.lephar.com/download.htm
+   - Rename to 'ledock.exe' and place in 'bin' folder.
+
+2. Vina-GPU+
+   - Download from GitHub: https://github.com/DeltaGroupNJUPT/Vina-GPU-2.1
+   - You need 'Vina-GPU.exe' and 'Kernel2_Opt.bin'.
+   - Place both in 'bin' folder (rename executable to 'vina_gpu.exe').
+
+3. PLANTS
+   - Requires academic license.
+   - Place 'plants.exe' in 'bin' folder.
+
+4. Smina & Gnina
+   - Install via Conda (Smina installed automatically if possible).
+   - Gnina requires WSL.
+"""
 
 def print_instructions():
     print("\n=== Engine Setup Summary ===")
     
     # Check Vina
-    if os.path.exists(os.path.join(BIN_DIR, "vina.exe")):
+    if _bin_exists("vina.exe"):
         print("[INSTALLED] AutoDock Vina")
     else:
         print("[MISSING] AutoDock Vina (Use Smina)")
 
     # Check QuickVina
-    if os.path.exists(os.path.join(BIN_DIR, "qvina.exe")):
+    if _bin_exists("qvina.exe"):
         print("[INSTALLED] QuickVina 2")
     else:
         print("[MISSING] QuickVina 2")
 
     # Check AutoDock 4
-    if os.path.exists(os.path.join(BIN_DIR, "autodock_installer.exe")):
+    if _download_complete(os.path.join(BIN_DIR, "autodock_installer.exe")):
         print("[DOWNLOADED] AutoDock 4 Installer (Run this file to install)")
     else:
         print("[MISSING] AutoDock 4 Installer")
 
     # Check LeDock
-    ledock_path = os.path.join(BIN_DIR, "ledock.exe")
-    ledock_folder_path = os.path.join(BIN_DIR, "ledock", "LeDock.exe")
-    if (os.path.exists(ledock_path) and os.path.getsize(ledock_path) > 1000) or \
-       (os.path.exists(ledock_folder_path) and os.path.getsize(ledock_folder_path) > 1000):
+    if _ledock_installed():
         print("[INSTALLED] LeDock")
     else:
         print("[MISSING] LeDock (Manual Download Required)")
 
     # Check Vina-GPU
-    vina_gpu_path = os.path.join(BIN_DIR, "vina_gpu.exe")
-    if os.path.exists(vina_gpu_path) and os.path.getsize(vina_gpu_path) > 1000:
+    if _bin_size("vina_gpu.exe") > 1000:
         print("[INSTALLED] Vina-GPU+")
     else:
         print("[MISSING] Vina-GPU+ (Manual Download Required)")
 
-    print("\n=== Manual Installation Required ===")
-    print("The following engines require manual download due to license/hosting restrictions:")
-    
-    print("\n1. LeDock")
-    print("   - Download 'ledock_win32.exe' from: http://www.lephar.com/download.htm")
-    print("   - Rename to 'ledock.exe' and place in 'bin' folder.")
-
-    print("\n2. Vina-GPU+")
-    print("   - Download from GitHub: https://github.com/DeltaGroupNJUPT/Vina-GPU-2.1")
-    print("   - You need 'Vina-GPU.exe' and 'Kernel2_Opt.bin'.")
-    print("   - Place both in 'bin' folder (rename executable to 'vina_gpu.exe').")
-
-    print("\n3. PLANTS")
-    print("   - Requires academic license.")
-    print("   - Place 'plants.exe' in 'bin' folder.")
-
-    print("\n4. Smina & Gnina")
-    print("   - Install via Conda (Smina installed automatically if possible).")
-    print("   - Gnina requires WSL.")
+    sys.stdout.write(_INSTRUCTIONS)
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     setup_bin_dir()
-    setup_vina()
-    setup_qvina()
-    setup_ad4()
-    setup_ledock()
-    setup_vina_gpu()
-    setup_plants()
+    steps = [setup_vina, setup_qvina, setup_ad4, setup_ledock, setup_vina_gpu, setup_plants]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_run_step, steps))
     print_instructions()
     input("\nPress Enter to exit...")
@@ -5,26 +5,33 @@ import sys
 
 BASE_URL = "http://127.0.0.1:8000"
 
+# One keep-alive connection pool shared by every call in this script
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def wait_for_api():
     print("Waiting for API to start...")
-    for i in range(10):
+    # Poll quickly at first, backing off to 2 s between attempts
+    delay = 0.05
+    for i in range(12):
         try:
-            r = requests.get(f"{BASE_URL}/")
+            r = SESSION.get(f"{BASE_URL}/", timeout=0.5)
             if r.status_code == 200:
                 print("API is online!")
                 return True
-        except requests.ConnectionError:
+        except (requests.ConnectionError, requests.Timeout):
             pass
-        time.sleep(2)
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
     return False
 
 def test_system():
     print("\n--- Testing System ---")
-    r = requests.get(f"{BASE_URL}/system/info")
+    r = SESSION.get(f"{BASE_URL}/system/info")
     print(f"Info: {r.status_code} - {r.json()}")
     assert r.status_code == 200
     
-    r = requests.get(f"{BASE_URL}/system/engines")
+    r = SESSION.get(f"{BASE_URL}/system/engines")
     print(f"Engines: {r.status_code} - {r.json()}")
     assert r.status_code == 200
 
@@ -33,12 +40,12 @@ def test_projects():
     # Create
     project_name = f"TestProject_{int(time.time())}"
     payload = {"name": project_name, "description": "API Test"}
-    r = requests.post(f"{BASE_URL}/projects/", json=payload)
+    r = SESSION.post(f"{BASE_URL}/projects/", json=payload)
     print(f"Create Project: {r.status_code} - {r.json()}")
     assert r.status_code == 200
     
     # List
-    r = requests.get(f"{BASE_URL}/projects/")
+    r = SESSION.get(f"{BASE_URL}/projects/")
     projects = r.json()
     print(f"List Projects: Found {len(projects)}")
     assert len(projects) > 0
@@ -46,7 +53,7 @@ def test_projects():
     # Upload Dummy File
     dummy_content = b"REMARK  DUMMY PDB FILE"
     files = {'file': ('test.pdb', dummy_content)}
-    r = requests.post(f"{BASE_URL}/projects/{project_name}/upload", files=files)
+    r = SESSION.post(f"{BASE_URL}/projects/{project_name}/upload", files=files)
     print(f"Upload File: {r.status_code} - {r.json()}")
     assert r.status_code == 200
 
@@ -2,59 +2,70 @@ import requests
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://127.0.0.1:8000"
 
+# One keep-alive connection pool shared by every call in this script
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def wait_for_api():
     print("Waiting for API to start...")
-    for i in range(10):
+    # Poll quickly at first, backing off to 2 s between attempts
+    delay = 0.05
+    for i in range(12):
         try:
-            r = requests.get(f"{BASE_URL}/")
+            r = SESSION.get(f"{BASE_URL}/", timeout=0.5)
             if r.status_code == 200:
                 print("API is online!")
                 return True
-        except requests.ConnectionError:
+        except (requests.ConnectionError, requests.Timeout):
             pass
-        time.sleep(2)
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
     return False
 
 def test_full_features():
     print("\n--- Testing Full Features ---")
     
-    # 1. System
-    r = requests.get(f"{BASE_URL}/system/info")
-    assert r.status_code == 200
-    
-    # 2. Project
-    project_name = f"FeatureTest_{int(time.time())}"
-    r = requests.post(f"{BASE_URL}/projects/", json={"name": project_name})
-    assert r.status_code == 200
-    print(f"[OK] Created Project: {project_name}")
-    
-    # 3. Upload File (Ligand)
-    # Create a dummy PDB with atom coordinates for GridBox testing
-    dummy_pdb = "ATOM      1  N   ALA A   1      30.000  40.000  50.000  1.00  0.00           N"
-    with open("dummy_model.pdb", "w") as f:
-        f.write(dummy_pdb)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # 1. System (independent of the project calls, so it overlaps them)
+        fut_info = executor.submit(SESSION.get, f"{BASE_URL}/system/info")
+        
+        # 2. Project
+        project_name = f"FeatureTest_{int(time.time())}"
+        r = SESSION.post(f"{BASE_URL}/projects/", json={"name": project_name})
+        assert r.status_code == 200
+        print(f"[OK] Created Project: {project_name}")
         
-    files = {'file': ('dummy_model.pdb', open("dummy_model.pdb", "rb"))}
-    r = requests.post(f"{BASE_URL}/projects/{project_name}/upload", files=files)
-    assert r.status_code == 200
-    print(f"[OK] Uploaded Dummy Ligand")
+        # 3. Upload File (Ligand)
+        # Create a dummy PDB with atom coordinates for GridBox testing
+        # (sent from memory; the server keeps its own copy in the project)
+        dummy_pdb = b"ATOM      1  N   ALA A   1      30.000  40.000  50.000  1.00  0.00           N"
+        files = {'file': ('dummy_model.pdb', dummy_pdb, 'chemical/x-pdb')}
+        r = SESSION.post(f"{BASE_URL}/projects/{project_name}/upload", files=files)
+        assert r.status_code == 200
+        print(f"[OK] Uploaded Dummy Ligand")
+        
+        # 4. GridBox Calc and 5. History only depend on the upload
+        fut_gb = executor.submit(SESSION.post, f"{BASE_URL}/analysis/{project_name}/gridbox",
+                                 params={"ligand_file": "dummy_model.pdb"})
+        fut_hist = executor.submit(SESSION.get, f"{BASE_URL}/projects/{project_name}/history")
+        
+        r_info, r_gb, r_hist = fut_info.result(), fut_gb.result(), fut_hist.result()
+    
+    assert r_info.status_code == 200
     
-    # 4. GridBox Calc
-    r = requests.post(f"{BASE_URL}/analysis/{project_name}/gridbox?ligand_file=dummy_model.pdb")
-    if r.status_code == 200:
-        gb = r.json()
+    if r_gb.status_code == 200:
+        gb = r_gb.json()
         print(f"[OK] GridBox Calculated: {gb}")
         assert gb['center_x'] == 30.0
     else:
-        print(f"[FAIL] GridBox Error: {r.text}")
+        print(f"[FAIL] GridBox Error: {r_gb.text}")
 
-    # 5. History
-    r = requests.get(f"{BASE_URL}/projects/{project_name}/history")
-    assert r.status_code == 200
-    print(f"[OK] History Retrieved: {len(r.json())} sessions")
+    assert r_hist.status_code == 200
+    print(f"[OK] History Retrieved: {len(r_hist.json())} sessions")
 
 if __name__ == "__main__":
     if not wait_for_api():
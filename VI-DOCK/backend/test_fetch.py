@@ -3,19 +3,23 @@ import requests
 PROJECT = "demo_session"
 BASE_URL = "http://127.0.0.1:8000"
 
+# One keep-alive connection pool shared by every call in this script
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def test_fetch(source, id):
     print(f"Testing Fetch {source.upper()} {id}...")
     try:
         # Check Root first
         try:
-             requests.get(f"{BASE_URL}/")
+             SESSION.get(f"{BASE_URL}/")
         except:
              print("API Root not accessible")
              return
 
         url = f"{BASE_URL}/projects/{PROJECT}/fetch"
         print(f"POST {url}")
-        resp = requests.post(url, params={"source": source, "id": id})
+        resp = SESSION.post(url, params={"source": source, "id": id})
         
         if resp.status_code == 200:
             print("SUCCESS:", resp.json()['status'])
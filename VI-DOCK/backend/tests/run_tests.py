@@ -7,16 +7,26 @@ import unittest
 import sys
 import os
 
+# pytest-xdist runs the test modules in parallel worker processes; without it
+# we fall back to the serial unittest runner below.
+try:
+    import pytest
+    import xdist  # noqa: F401
+except ImportError:
+    pytest = None
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# run_tests.py is in tests/, so project root is one level up
+_ROOT = os.path.dirname(_HERE)
+
 def run_tests():
     """Run all unit tests."""
     # Add the project root to Python path
-    # run_tests.py is in tests/, so project root is one level up
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    sys.path.insert(0, project_root)
+    sys.path.insert(0, _ROOT)
     
     # Discover and run tests
     loader = unittest.TestLoader()
-    start_dir = os.path.join(project_root, 'tests')
+    start_dir = _HERE
     
     print(f"Running tests from: {start_dir}")
     print(f"Python path: {sys.path}")
@@ -26,7 +36,12 @@ def run_tests():
         print(f"Error: Test directory not found: {start_dir}")
         return 1
     
-    suite = loader.discover(start_dir, pattern='test_*.py')
+    if pytest is not None:
+        return pytest.main([start_dir, '-n', 'auto', '-p', 'no:cacheprovider', '-q'])
+    
+    # tests/ is a package under the project root; naming the top level up front
+    # lets discover import test modules as tests.* without probing for it
+    suite = loader.discover(start_dir, pattern='test_*.py', top_level_dir=_ROOT)
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
@@ -0,0 +1,100 @@
+import unittest
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+# Add the project root to Python path
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+sys.path.insert(0, _ROOT)
+
+from core import file_manager
+from core.file_manager import FileManager
+
+_RECEPTOR_PDB = b"ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N  \n"
+_PREPARED_PDBQT = b"ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00     0.000 N \n"
+
+
+class TestReceptorCache(unittest.TestCase):
+    """Test cases for the prepared-receptor cache."""
+    
+    def setUp(self):
+        """Point the cache at a private temporary folder."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        patcher = patch.object(file_manager, 'RECEPTOR_CACHE_DIR', self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.manager = FileManager()
+        self.receptor_path = os.path.join(self.temp_dir, "receptor.pdb")
+        Path(self.receptor_path).write_bytes(_RECEPTOR_PDB)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self._tmp.cleanup()
+    
+    def _fake_convert(self, receptor_path, output_dir, remove_water, remove_hetatm):
+        output_path = os.path.join(output_dir, f"{Path(receptor_path).stem}_receptor.pdbqt")
+        Path(output_path).write_bytes(_PREPARED_PDBQT)
+        return output_path, ["INITIALIZING_PREP", "PREP_COMPLETE"]
+    
+    def test_second_prepare_hits_cache(self):
+        """Test that a repeated preparation is served from the cache."""
+        with patch.object(self.manager, '_convert_receptor', side_effect=self._fake_convert) as mock_convert:
+            self.manager.prepare_receptor(self.receptor_path, self.temp_dir)
+            path, steps = self.manager.prepare_receptor(self.receptor_path, self.temp_dir)
+        
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertIn("LOADED_FROM_CACHE", steps)
+        self.assertEqual(Path(path).read_bytes(), _PREPARED_PDBQT)
+        # Only the finished entry is left behind, in a folder private to the user
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.endswith(".part")], [])
+        if os.name != 'nt':
+            self.assertEqual(os.stat(self.cache_dir).st_mode & 0o077, 0)
+    
+    @unittest.skipIf(os.name == 'nt', "POSIX permissions")
+    def test_shared_cache_dir_is_not_trusted(self):
+        """Test that a cache folder others can write into is not used."""
+        os.makedirs(self.cache_dir)
+        os.chmod(self.cache_dir, 0o777)
+        
+        self.assertEqual(self.manager._receptor_cache_paths(self.receptor_path, True, True), {})
+    
+    def test_fallback_output_is_cached_under_obabel(self):
+        """Test that output from the obabel fallback is not cached as pybel output."""
+        def fallback_convert(*args):
+            output_path, _ = self._fake_convert(*args)
+            return output_path, ["INITIALIZING_PREP", "VALIDATING_INPUT", "PREP_COMPLETE"]
+        
+        self.manager.has_bindings = True
+        with patch.object(self.manager, '_convert_receptor', side_effect=fallback_convert) as mock_convert:
+            self.manager.prepare_receptor(self.receptor_path, self.temp_dir)
+            path, steps = self.manager.prepare_receptor(self.receptor_path, self.temp_dir)
+        
+        cache_paths = self.manager._receptor_cache_paths(self.receptor_path, True, True)
+        self.assertFalse(os.path.exists(cache_paths["pybel"]))
+        self.assertTrue(os.path.exists(cache_paths["obabel"]))
+        # The fallback's entry is still reused rather than converting again
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertIn("LOADED_FROM_CACHE", steps)
+    
+    def test_cache_is_pruned(self):
+        """Test that the least recently used entries are dropped beyond the limit."""
+        os.makedirs(self.cache_dir, mode=0o700)
+        for i in range(5):
+            entry = os.path.join(self.cache_dir, f"{i:032x}.pdbqt")
+            Path(entry).write_bytes(_PREPARED_PDBQT)
+            os.utime(entry, (i, i))
+        
+        with patch.object(file_manager, 'RECEPTOR_CACHE_MAX_ENTRIES', 3):
+            FileManager._prune_receptor_cache()
+        
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), [f"{i:032x}.pdbqt" for i in (2, 3, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
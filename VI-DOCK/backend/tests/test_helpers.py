@@ -0,0 +1,208 @@
+import asyncio
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+# Add the project root to Python path
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+sys.path.insert(0, _ROOT)
+
+from utils.helpers import command_group, kill_command_group, release_command_group, run_command
+from utils.helpers import create_directory, run_command_async, run_command_streaming, validate_dir, validate_file_exists, validate_files_exist
+
+
+class TestFileValidation(unittest.TestCase):
+    """Test cases for the file validation helpers."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Create a small tree of files once for the whole class."""
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.temp_dir = cls._tmp.name
+        cls.ligand = os.path.join(cls.temp_dir, "ligand.pdbqt")
+        cls.sub_dir = os.path.join(cls.temp_dir, "sub")
+        cls.nested = os.path.join(cls.sub_dir, "nested.pdbqt")
+        os.mkdir(cls.sub_dir)
+        Path(cls.ligand).write_bytes(b"ROOT\n")
+        Path(cls.nested).write_bytes(b"ROOT\n")
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up test fixtures."""
+        cls._tmp.cleanup()
+    
+    def test_validate_file_exists(self):
+        """Test single-file validation."""
+        self.assertTrue(validate_file_exists(self.ligand))
+        self.assertFalse(validate_file_exists(self.sub_dir))
+        self.assertFalse(validate_file_exists(os.path.join(self.temp_dir, "missing.pdbqt")))
+    
+    def test_validate_files_exist(self):
+        """Test batch validation across several directories."""
+        paths = [
+            self.ligand,
+            self.sub_dir,
+            self.nested,
+            os.path.join(self.temp_dir, "missing.pdbqt"),
+            os.path.join(self.temp_dir, "no_such_dir", "ligand.pdbqt"),
+        ]
+        
+        self.assertEqual(validate_files_exist(paths), [True, False, True, False, False])
+        self.assertEqual(validate_files_exist([]), [])
+        self.assertEqual(validate_dir(iter(paths)), dict(zip(paths, [True, False, True, False, False])))
+    
+    def test_validate_file_exists_max_age(self):
+        """Test that answers are reused within max_age and re-checked otherwise."""
+        with patch('utils.helpers.os.stat', wraps=os.stat) as mock_stat:
+            self.assertTrue(validate_file_exists(self.ligand, max_age=60))
+            self.assertTrue(validate_file_exists(self.ligand, max_age=60))
+            self.assertEqual(mock_stat.call_count, 1)
+            
+            validate_file_exists(self.ligand)
+            self.assertEqual(mock_stat.call_count, 2)
+
+
+class TestRunCommandAsync(unittest.TestCase):
+    """Test cases for run_command_async."""
+    
+    def test_cancel_kills_process(self):
+        """Test that cancelling the awaiting task kills the child process."""
+        started = {}
+        real_exec = asyncio.create_subprocess_exec
+        
+        async def tracking_exec(*args, **kwargs):
+            started['process'] = await real_exec(*args, **kwargs)
+            return started['process']
+        
+        async def run_and_cancel():
+            task = asyncio.ensure_future(
+                run_command_async([sys.executable, "-c", "import time; time.sleep(30)"]))
+            while 'process' not in started:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        
+        with patch('utils.helpers.asyncio.create_subprocess_exec', tracking_exec):
+            asyncio.run(run_and_cancel())
+        
+        self.assertIsNotNone(started['process'].returncode)
+    
+    def test_timeout(self):
+        """Test that a timeout kills the process and raises TimeoutExpired."""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(run_command_async([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.2))
+
+
+class TestRunCommandStreaming(unittest.TestCase):
+    """Test cases for run_command_streaming."""
+    
+    def test_conda_resolves_like_run_command(self):
+        """Test that a bare 'conda' runs the launcher resolved at import."""
+        lines = []
+        with patch('utils.helpers._CONDA_EXE', sys.executable):
+            result = run_command_streaming(["conda", "-c", "print('streamed')"], lines.append)
+        
+        self.assertEqual(result.args[0], sys.executable)
+        self.assertEqual(lines, ["streamed\n"])
+
+
+class TestCommandGroup(unittest.TestCase):
+    """Test cases for killing a group of running commands."""
+    
+    def test_kill_command_group(self):
+        """Test that killing a group stops its running and later commands."""
+        errors = []
+        started = os.path.join(tempfile.gettempdir(), f"simdock_started_{os.getpid()}")
+        sleeper = f"import pathlib, time; pathlib.Path({started!r}).touch(); time.sleep(30)"
+        
+        def worker():
+            with command_group("job-1"):
+                for _ in range(2):
+                    try:
+                        run_command([sys.executable, "-c", sleeper])
+                    except Exception as e:
+                        errors.append(e)
+        
+        thread = threading.Thread(target=worker)
+        start = time.monotonic()
+        thread.start()
+        try:
+            # Kill the group once its first command is running
+            while not os.path.exists(started) and time.monotonic() - start < 10:
+                time.sleep(0.01)
+            self.assertEqual(kill_command_group("job-1"), 1)
+            thread.join(10)
+        finally:
+            release_command_group("job-1")
+            if os.path.exists(started):
+                os.remove(started)
+        
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(len(errors), 2)
+        # Commands outside the group are unaffected
+        self.assertEqual(run_command([sys.executable, "-c", "print('ok')"]).stdout, "ok\n")
+
+
+class TestCreateDirectory(unittest.TestCase):
+    """Test cases for create_directory."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self._tmp.cleanup()
+    
+    def test_create_nested_directory(self):
+        """Test creating nested output folders and repeating the call."""
+        target = os.path.join(self.temp_dir, "out", "lig_0001")
+        
+        self.assertTrue(create_directory(target))
+        self.assertTrue(os.path.isdir(target))
+        self.assertTrue(create_directory(target))
+    
+    def test_removed_directory_is_recreated(self):
+        """Test that a directory deleted after creation is made again."""
+        target = os.path.join(self.temp_dir, "work", "chunk_0")
+        self.assertTrue(create_directory(target))
+        
+        shutil.rmtree(os.path.join(self.temp_dir, "work"))
+        
+        self.assertTrue(create_directory(target))
+        self.assertTrue(os.path.isdir(target))
+    
+    def test_cached_directory_removed_is_recreated(self):
+        """Test that a cache hit for a directory removed since is not trusted."""
+        target = os.path.join(self.temp_dir, "results", "lig_0001")
+        self.assertTrue(create_directory(target))
+        # Second call is answered from the cache
+        self.assertTrue(create_directory(target))
+        
+        os.rmdir(target)
+        
+        self.assertTrue(create_directory(target))
+        self.assertTrue(os.path.isdir(target))
+        Path(target, "out.pdbqt").write_bytes(b"MODEL 1\n")
+    
+    def test_create_directory_failure(self):
+        """Test that a path blocked by a file reports failure."""
+        blocker = os.path.join(self.temp_dir, "blocker")
+        Path(blocker).write_bytes(b"")
+        
+        self.assertFalse(create_directory(os.path.join(blocker, "sub")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,38 +2,42 @@ import unittest
 import os
 import tempfile
 import json
-import shutil
+import zipfile
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import patch
 
 import sys
 # Add the project root to Python path - FIXED PATH
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+sys.path.insert(0, _ROOT)
 
-from core.project_manager import ProjectManager, ProjectBrowser
+from core.project_manager import ProjectManager, ProjectBrowser, _dumps
 
 
 class TestProjectManager(unittest.TestCase):
     """Test cases for ProjectManager functionality."""
     
+    RECEPTOR_BYTES = b"ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N  \n"
+    LIGAND_BYTES = b"HETATM    1  C1  LIG A   1       5.000   5.000   5.000  1.00  0.00           C  \n"
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.project_manager = ProjectManager()
         
         # Create test files
         self.test_receptor = os.path.join(self.temp_dir, "test_receptor.pdb")
         self.test_ligand = os.path.join(self.temp_dir, "test_ligand.pdb")
         
-        with open(self.test_receptor, 'w') as f:
-            f.write("ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N  \n")
-        
-        with open(self.test_ligand, 'w') as f:
-            f.write("HETATM    1  C1  LIG A   1       5.000   5.000   5.000  1.00  0.00           C  \n")
+        Path(self.test_receptor).write_bytes(self.RECEPTOR_BYTES)
+        Path(self.test_ligand).write_bytes(self.LIGAND_BYTES)
     
     def tearDown(self):
         """Clean up test fixtures."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self._tmp.cleanup()
     
     def test_create_new_project(self):
         """Test creating a new project."""
@@ -91,8 +95,7 @@ class TestProjectManager(unittest.TestCase):
         
         # Verify save
         project_file = os.path.join(project_path, 'project.json')
-        with open(project_file, 'r') as f:
-            saved_data = json.load(f)
+        saved_data = json.loads(Path(project_file).read_bytes())
         
         self.assertEqual(saved_data['project_info']['test_key'], 'test_value')
         self.assertIn('modified', saved_data['project_info'])
@@ -143,8 +146,7 @@ class TestProjectManager(unittest.TestCase):
         ]
         
         for path in ligand_paths:
-            with open(path, 'w') as f:
-                f.write("HETATM    1  C1  LIG A   1       5.000   5.000   5.000  1.00  0.00           C  \n")
+            Path(path).write_bytes(self.LIGAND_BYTES)
         
         stored_paths = self.project_manager.add_ligands(ligand_paths, copy_files=True)
         
@@ -214,9 +216,19 @@ class TestProjectManager(unittest.TestCase):
         self.assertTrue(os.path.exists(backup_path))
         self.assertTrue(backup_path.endswith('.zip'))
         
+        # Small files are stored uncompressed, and the archive doesn't contain itself
+        with zipfile.ZipFile(backup_path) as archive:
+            info = archive.getinfo('project.json')
+            self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+            self.assertNotIn(os.path.relpath(backup_path, project_path).replace(os.sep, '/'), archive.namelist())
+        
         # Check that backup info was added to project data
         self.assertIn('backups', self.project_manager.project_data)
         self.assertEqual(len(self.project_manager.project_data['backups']), 1)
+    
+    def test_project_json_format(self):
+        """Test that project JSON is UTF-8 with 2-space indentation and string keys."""
+        self.assertEqual(_dumps({1: "caf\u00e9"}), '{\n  "1": "caf\u00e9"\n}'.encode('utf-8'))
 
 
 class TestProjectBrowser(unittest.TestCase):
@@ -224,13 +236,23 @@ class TestProjectBrowser(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.projects_dir = os.path.join(self.temp_dir, "projects")
         os.makedirs(self.projects_dir)
     
     def tearDown(self):
         """Clean up test fixtures."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self._tmp.cleanup()
+    
+    def _write_projects(self, projects):
+        """Create one folder with a project.json per entry of {folder name: project data}."""
+        # Serialize everything up front, then write each file in a single call
+        blobs = [(os.path.join(self.projects_dir, name), json.dumps(data).encode())
+                 for name, data in projects.items()]
+        for project_dir, blob in blobs:
+            os.mkdir(project_dir)
+            Path(project_dir, 'project.json').write_bytes(blob)
     
     def test_list_projects_empty(self):
         """Test listing projects from empty directory."""
@@ -257,8 +279,7 @@ class TestProjectBrowser(unittest.TestCase):
             'docking_sessions': [{'name': 'session1'}]
         }
         
-        with open(os.path.join(project_dir, 'project.json'), 'w') as f:
-            json.dump(project_data, f)
+        Path(project_dir, 'project.json').write_bytes(json.dumps(project_data).encode())
         
         projects = ProjectBrowser.list_projects(self.projects_dir)
         
@@ -276,14 +297,27 @@ class TestProjectBrowser(unittest.TestCase):
         projects = ProjectBrowser.list_projects(self.projects_dir)
         self.assertEqual(projects, [])
     
+    def test_list_projects_large_scale(self):
+        """Test listing a projects directory with many entries."""
+        self._write_projects({
+            f"project_{i:04d}": {'project_info': {'name': f'Project {i}', 'modified': f'2024-01-01T12:{i // 60:02d}:{i % 60:02d}'}}
+            for i in range(1000)
+        })
+        
+        # Stray files next to the project folders are ignored
+        Path(self.projects_dir, 'notes.txt').write_bytes(b"not a project")
+        
+        projects = ProjectBrowser.list_projects(self.projects_dir)
+        
+        self.assertEqual(len(projects), 1000)
+        self.assertEqual(projects[0]['name'], 'Project 999')
+        self.assertEqual(projects[-1]['name'], 'Project 0')
+    
     def test_get_recent_projects(self):
         """Test getting recent projects."""
         # Create multiple projects
-        for i in range(3):
-            project_dir = os.path.join(self.projects_dir, f"project_{i}")
-            os.makedirs(project_dir)
-            
-            project_data = {
+        self._write_projects({
+            f"project_{i}": {
                 'project_info': {
                     'name': f'Project {i}',
                     'created': f'2024-01-0{i+1}T12:00:00',
@@ -292,9 +326,8 @@ class TestProjectBrowser(unittest.TestCase):
                 'files': {'receptors': [], 'ligands': []},
                 'docking_sessions': []
             }
-            
-            with open(os.path.join(project_dir, 'project.json'), 'w') as f:
-                json.dump(project_data, f)
+            for i in range(3)
+        })
         
         recent_projects = ProjectBrowser.get_recent_projects(self.projects_dir, limit=2)
         
@@ -1,41 +1,72 @@
+import asyncio
 import unittest
 import os
+import subprocess
 import tempfile
-from unittest.mock import Mock, patch, MagicMock
+from pathlib import Path
+from unittest.mock import Mock, patch, MagicMock, create_autospec
 import sys
 
 # Add the project root to Python path - FIXED PATH
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+sys.path.insert(0, _ROOT)
 
-from core.docking_engine import VinaEngine, DockingEngineFactory
+from core.docking_engine import VinaEngine, SminaEngine, GninaEngine, DockingEngineFactory
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+_RECEPTOR_PDB = (
+    b"ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N  \n"
+    b"ATOM      2  CA  ALA A   1       1.458   0.000   0.000  1.00  0.00           C  \n"
+)
+_LIGAND_PDB = (
+    b"HETATM    1  C1  LIG A   1       5.000   5.000   5.000  1.00  0.00           C  \n"
+    b"HETATM    2  C2  LIG A   1       6.000   5.000   5.000  1.00  0.00           C  \n"
+)
+
+_MODE_TABLE_BYTES = (
+    b"mode |   affinity | dist from best mode\n"
+    b"   1         -9.1      0.000      0.000\n"
+    b"   2         -8.5      1.234      1.234\n"
+)
 
 
 class TestVinaEngine(unittest.TestCase):
     """Test cases for VinaEngine docking functionality."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.engine = VinaEngine()
-        self.temp_dir = tempfile.mkdtemp()
+    @classmethod
+    def setUpClass(cls):
+        """Write the input structures once for the whole class."""
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.temp_dir = cls._tmp.name
         
         # Create mock receptor and ligand files
-        self.receptor_path = os.path.join(self.temp_dir, "test_receptor.pdb")
-        self.ligand_path = os.path.join(self.temp_dir, "test_ligand.pdb")
-        self.output_path = os.path.join(self.temp_dir, "output.pdbqt")
+        cls.receptor_path = os.path.join(cls.temp_dir, "test_receptor.pdb")
+        cls.ligand_path = os.path.join(cls.temp_dir, "test_ligand.pdb")
+        cls.output_path = os.path.join(cls.temp_dir, "output.pdbqt")
         
         # Create minimal valid PDB files for testing
-        with open(self.receptor_path, 'w') as f:
-            f.write("ATOM      1  N   ALA A   1       0.000   0.000   0.000  1.00  0.00           N  \n")
-            f.write("ATOM      2  CA  ALA A   1       1.458   0.000   0.000  1.00  0.00           C  \n")
+        Path(cls.receptor_path).write_bytes(_RECEPTOR_PDB)
+        Path(cls.ligand_path).write_bytes(_LIGAND_PDB)
         
-        with open(self.ligand_path, 'w') as f:
-            f.write("HETATM    1  C1  LIG A   1       5.000   5.000   5.000  1.00  0.00           C  \n")
-            f.write("HETATM    2  C2  LIG A   1       6.000   5.000   5.000  1.00  0.00           C  \n")
+        # Stand-in for a finished Vina process, shared by the tests that mock run_command
+        cls._mock_proc = create_autospec(subprocess.CompletedProcess, instance=True)
+        cls._mock_proc.stdout = _MODE_TABLE_BYTES.decode()
+        cls._mock_proc.stderr = ""
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up test fixtures."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        cls._tmp.cleanup()
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.engine = VinaEngine()
     
     def test_vina_engine_initialization(self):
         """Test that VinaEngine initializes correctly."""
@@ -60,36 +91,134 @@ class TestVinaEngine(unittest.TestCase):
         self.assertFalse(result)
     
     @patch('core.docking_engine.run_command')
-    @patch('core.docking_engine.os.path.exists')
-    def test_run_docking_success(self, mock_exists, mock_run_command):
+    def test_run_docking_success(self, mock_run_command):
         """Test successful docking execution."""
-        # Mock the command execution
+        mock_run_command.return_value = self._mock_proc
+        # The pose file Vina would have written
+        with open(self.output_path, 'w') as f:
+            f.write("MODEL 1\n")
+        
+        center = (10.0, 10.0, 10.0)
+        size = (20.0, 20.0, 20.0)
+        
+        result = self.engine.run_docking(
+            self.receptor_path, self.ligand_path, self.output_path,
+            center, size, exhaustiveness=8
+        )
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['engine'], "AutoDock Vina")
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in result['scores']], [-9.1, -8.5])
+    
+    @patch('core.docking_engine.run_command_streaming')
+    def test_run_docking_streams_scores(self, mock_streaming):
+        """Test that on_score sees each results row as the engine prints it."""
+        stdout_lines = [
+            "Performing docking (random seed: 1) ... done.\n",
+            "mode |   affinity | dist from best mode\n",
+            "-----+------------+----------+----------\n",
+            "   1         -9.1      0.000      0.000\n",
+            "   2         -8.5      1.234      1.234\n",
+        ]
+        
+        def fake_streaming(command, on_line, cwd=None, env=None):
+            for line in stdout_lines:
+                on_line(line)
+            return Mock(stdout="".join(stdout_lines), stderr="")
+        
+        mock_streaming.side_effect = fake_streaming
+        with open(self.output_path, 'w') as f:
+            f.write("MODEL 1\n")
+        
+        partial = []
+        result = self.engine.run_docking(
+            self.receptor_path, self.ligand_path, self.output_path,
+            (10.0, 10.0, 10.0), (20.0, 20.0, 20.0), on_score=partial.append
+        )
+        
+        self.assertTrue(result['success'])
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in partial], [-9.1, -8.5])
+        self.assertEqual(partial, result['scores'])
+    
+    def test_supports_score_streaming(self):
+        """Test which engines take an on_score callback."""
+        self.assertTrue(self.engine.supports_score_streaming())
+        self.assertTrue(SminaEngine().supports_score_streaming())
+        self.assertFalse(GninaEngine().supports_score_streaming())
+    
+    @patch('core.docking_engine.run_command_async')
+    def test_run_docking_many(self, mock_run_async):
+        """Test concurrent docking where one ligand's run fails."""
+        ligand_paths = [os.path.join(self.temp_dir, f"many{i}.pdbqt") for i in (1, 2)]
+        output_dir = os.path.join(self.temp_dir, "many_out")
+        
+        async def fake_run(command, cwd=None, env=None):
+            if "many2.pdbqt" in command[command.index("--ligand") + 1]:
+                raise Exception("Error with vina: bad ligand")
+            with open(command[command.index("--out") + 1], 'w') as f:
+                f.write("MODEL 1\n")
+            return Mock(stdout="mode |   affinity\n   1         -6.2      0.000      0.000\n", stderr="")
+        
+        mock_run_async.side_effect = fake_run
+        
+        results = asyncio.run(self.engine.run_docking_many(
+            self.receptor_path + "qt", ligand_paths, output_dir,
+            (10.0, 10.0, 10.0), (20.0, 20.0, 20.0)
+        ))
+        
+        self.assertEqual(mock_run_async.call_count, 2)
+        self.assertTrue(results[ligand_paths[0]]['success'])
+        self.assertEqual(results[ligand_paths[0]]['scores'][0]['Affinity (kcal/mol)'], -6.2)
+        self.assertFalse(results[ligand_paths[1]]['success'])
+        self.assertIn("bad ligand", results[ligand_paths[1]]['error'])
+    
+    @patch('core.docking_engine.run_command')
+    def test_run_docking_batch(self, mock_run_command):
+        """Test docking several ligands in one batched Vina run."""
+        ligand_paths = [os.path.join(self.temp_dir, f"lig{i}.pdbqt") for i in (1, 2)]
+        output_dir = os.path.join(self.temp_dir, "batch_out")
+        os.makedirs(output_dir)
+        for i in (1, 2):
+            with open(os.path.join(output_dir, f"lig{i}_out.pdbqt"), 'w') as f:
+                f.write(f"REMARK VINA RESULT:    -{i}.0      0.000      0.000\n")
+        
         mock_process = Mock()
         mock_process.stdout = """
+        Performing docking (random seed: 1) ...
         mode |   affinity | dist from best mode
            1         -9.1      0.000      0.000
            2         -8.5      1.234      1.234
+        Performing docking (random seed: 1) ...
+        mode |   affinity | dist from best mode
+           1         -7.3      0.000      0.000
         """
         mock_run_command.return_value = mock_process
-        mock_exists.return_value = True
-        
-        # Mock file preparation
-        with patch.object(self.engine.file_manager, 'prepare_receptor') as mock_prep_rec:
-            with patch.object(self.engine.file_manager, 'prepare_ligand') as mock_prep_lig:
-                mock_prep_rec.return_value = self.receptor_path + "qt"
-                mock_prep_lig.return_value = self.ligand_path + "qt"
-                
-                center = (10.0, 10.0, 10.0)
-                size = (20.0, 20.0, 20.0)
-                
-                result = self.engine.run_docking(
-                    self.receptor_path, self.ligand_path, self.output_path,
-                    center, size, exhaustiveness=8
-                )
-                
-                self.assertTrue(result['success'])
-                self.assertEqual(result['engine'], "AutoDock Vina")
-                self.assertIn('scores', result)
+        
+        with patch.object(VinaEngine, 'supports_batch_docking', return_value=True):
+            results = self.engine.run_docking_batch(
+                self.receptor_path + "qt", ligand_paths, output_dir,
+                (10.0, 10.0, 10.0), (20.0, 20.0, 20.0), exhaustiveness=8
+            )
+        
+        # One process for both ligands
+        command = mock_run_command.call_args[0][0]
+        self.assertEqual(mock_run_command.call_count, 1)
+        self.assertEqual(command.count("--batch"), 2)
+        
+        # Scores come from the per-ligand tables in stdout, in input order
+        first, second = (results[path] for path in ligand_paths)
+        self.assertTrue(first['success'])
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in first['scores']], [-9.1, -8.5])
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in second['scores']], [-7.3])
+        
+        # With a table missing the order can't be trusted, so the pose files are read
+        mock_process.stdout = mock_process.stdout.split("Performing docking", 2)[1]
+        with patch.object(VinaEngine, 'supports_batch_docking', return_value=True):
+            results = self.engine.run_docking_batch(
+                self.receptor_path + "qt", ligand_paths, output_dir,
+                (10.0, 10.0, 10.0), (20.0, 20.0, 20.0), exhaustiveness=8
+            )
+        self.assertEqual(results[ligand_paths[1]]['scores'][0]['Affinity (kcal/mol)'], -2.0)
     
     def test_parse_output_valid(self):
         """Test parsing valid Vina output."""
@@ -108,6 +237,39 @@ class TestVinaEngine(unittest.TestCase):
         self.assertEqual(scores[0]['RMSD L.B.'], 0.000)
         self.assertEqual(scores[0]['RMSD U.B.'], 0.000)
     
+    @unittest.skipUnless(HAS_NUMPY, "NumPy not installed")
+    def test_parse_output_array(self):
+        """Test parsing Vina output into a score array."""
+        output_content = """
+        mode |   affinity | dist from best mode
+           1         -9.1      0.000      0.000
+           2         -8.5      1.234      1.234
+           3         -8.2      2.567      2.567
+        """
+        
+        scores = self.engine.parse_output_array(output_content)
+        
+        self.assertEqual(scores.shape, (3, 4))
+        self.assertEqual(scores[0, 0], 1)
+        self.assertAlmostEqual(scores[0, 1], -9.1)
+        self.assertAlmostEqual(scores[2, 3], 2.567)
+        self.assertEqual(self.engine.parse_output_array("").shape, (0, 4))
+    
+    def test_parse_output_file(self):
+        """Test parsing a Vina log file from disk."""
+        log_path = os.path.join(self.temp_dir, "vina.log")
+        with open(log_path, 'wb') as f:
+            f.write(b"mode |   affinity | dist from best mode\n"
+                    b"   1         -9.1      0.000      0.000\n"
+                    b"   2         -8.5      1.234      1.234\n")
+        
+        scores = self.engine.parse_output_file(log_path)
+        
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in scores], [-9.1, -8.5])
+        
+        open(log_path, 'wb').close()
+        self.assertEqual(self.engine.parse_output_file(log_path), [])
+    
     def test_parse_output_empty(self):
         """Test parsing empty Vina output."""
         scores = self.engine.parse_output("")
@@ -119,6 +281,42 @@ class TestVinaEngine(unittest.TestCase):
         scores = self.engine.parse_output(output_content)
         self.assertEqual(scores, [])
     
+    def test_parse_result_file(self):
+        """Test reading scores back from a docked pose file."""
+        with open(self.output_path, 'w') as f:
+            f.write("MODEL 1\n")
+            f.write("REMARK VINA RESULT:    -9.1      0.000      0.000\n")
+            f.write("ENDMDL\n")
+            f.write("MODEL 2\n")
+            f.write("REMARK VINA RESULT:    -8.5      1.234      2.345\n")
+            f.write("ENDMDL\n")
+        
+        scores = self.engine.parse_result_file(self.output_path)
+        
+        self.assertEqual(len(scores), 2)
+        self.assertEqual(scores[1]['Mode'], 2)
+        self.assertEqual(scores[1]['Affinity (kcal/mol)'], -8.5)
+        self.assertEqual(scores[1]['RMSD U.B.'], 2.345)
+    
+    def test_parse_result_file_smina(self):
+        """Test reading scores back from a Smina pose file."""
+        Path(self.output_path).write_bytes(
+            b"MODEL 1\n"
+            b"REMARK minimizedAffinity -9.12345\n"
+            b"ENDMDL\n"
+            b"MODEL 2\n"
+            b"REMARK minimizedAffinity -8.5\n"
+            b"ENDMDL\n"
+        )
+        
+        scores = SminaEngine().parse_result_file(self.output_path)
+        
+        self.assertEqual([s['Affinity (kcal/mol)'] for s in scores], [-9.12345, -8.5])
+        self.assertEqual(scores[1]['Mode'], 2)
+        self.assertEqual(scores[0]['Engine'], "Smina")
+        # The Vina parser finds nothing in the same file
+        self.assertEqual(self.engine.parse_result_file(self.output_path), [])
+    
     def test_get_default_parameters(self):
         """Test retrieval of default parameters."""
         params = self.engine.get_default_parameters()
@@ -1,40 +1,307 @@
+import asyncio
 import subprocess
 import os
 import sys
-from typing import Optional
-import shlex
+import shutil
+import stat
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, Dict, List, Set
 
 from .config import CREATE_NO_WINDOW
 
+# Popen keywords that only mean something on Windows; POSIX calls get none
+_EXTRA_KW = {'creationflags': CREATE_NO_WINDOW} if os.name == 'nt' else {}
 
-def run_command(command: list, cwd: str = None, timeout: int = None) -> Optional[subprocess.CompletedProcess]:
+# Thread-pool knobs of the numeric runtimes docking binaries may link against
+THREAD_LIMIT_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TBB_NUM_THREADS")
+
+
+def thread_limited_env(threads: int) -> Dict[str, str]:
+    """Copy of the current environment with native thread pools capped at `threads`."""
+    env = os.environ.copy()
+    for var in THREAD_LIMIT_VARS:
+        env[var] = str(max(1, int(threads)))
+    return env
+
+
+@lru_cache(maxsize=64)
+def _which_on_path(name: str, path_env: Optional[str]) -> Optional[str]:
+    return shutil.which(name, path=path_env)
+
+
+def _which(name: str) -> Optional[str]:
+    """shutil.which cached per executable name and PATH value."""
+    # A miss is cached too; callers then pass the bare name on and let the OS search
+    return _which_on_path(name, os.environ.get('PATH'))
+
+
+# conda launcher, resolved once; None when conda isn't on PATH at startup
+_CONDA_EXE: Optional[str] = _which('conda')
+
+
+def _resolve_command(command: list) -> list:
+    """Hand the OS an already-resolved executable, so no shell is needed to find it."""
+    if not command:
+        return command
+    if 'conda' in str(command[0]):
+        # Bare 'conda' goes to the launcher resolved at import (conda.bat/conda.exe on
+        # Windows), run directly rather than through cmd.exe
+        name = os.path.splitext(os.path.basename(str(command[0])))[0]
+        executable = _CONDA_EXE if name == 'conda' and _CONDA_EXE else _which(str(command[0]))
+    else:
+        executable = _which(str(command[0]))
+    if executable:
+        command = [executable] + list(command[1:])
+    return [str(arg) for arg in command]
+
+
+# Command groups: processes started inside `with command_group(tag)` are tracked under
+# that tag so kill_command_group(tag) can stop them, e.g. when a batch job is cancelled.
+_group_local = threading.local()
+_group_lock = threading.Lock()
+_group_procs: Dict[str, Set[subprocess.Popen]] = {}
+_cancelled_groups: Set[str] = set()
+
+
+@contextmanager
+def command_group(tag: str):
+    """Track commands this thread runs inside the block under `tag`."""
+    previous = getattr(_group_local, 'tag', None)
+    _group_local.tag = tag
+    try:
+        yield
+    finally:
+        _group_local.tag = previous
+
+
+def kill_command_group(tag: str) -> int:
+    """Kill every running process of the group, and any it starts later; returns how many."""
+    with _group_lock:
+        _cancelled_groups.add(tag)
+        procs = list(_group_procs.get(tag, ()))
+    for process in procs:
+        try:
+            process.kill()
+        except OSError:
+            pass
+    return len(procs)
+
+
+def release_command_group(tag: str):
+    """Forget a group once its owner is done, including a pending kill."""
+    with _group_lock:
+        _cancelled_groups.discard(tag)
+        _group_procs.pop(tag, None)
+
+
+def _track_process(process: subprocess.Popen) -> Optional[str]:
+    tag = getattr(_group_local, 'tag', None)
+    if tag is None:
+        return None
+    with _group_lock:
+        _group_procs.setdefault(tag, set()).add(process)
+        cancelled = tag in _cancelled_groups
+    if cancelled:
+        process.kill()
+    return tag
+
+
+def _untrack_process(process: subprocess.Popen, tag: Optional[str]):
+    if tag is None:
+        return
+    with _group_lock:
+        procs = _group_procs.get(tag)
+        if procs is not None:
+            procs.discard(process)
+
+
+def run_command(command: list, cwd: str = None, timeout: int = None,
+                env: Dict[str, str] = None) -> Optional[subprocess.CompletedProcess]:
     """Run a system command with error handling."""
+    command = _resolve_command(command)
+    try:
+        # subprocess.run, spelled out so the process can join a command group
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, cwd=cwd, env=env, **_EXTRA_KW)
+    except FileNotFoundError:
+        path_env = os.environ.get('PATH', 'PATH not set')
+        raise Exception(f"Command not found: '{command[0]}'. Working Dir: {os.getcwd()}. PATH: {path_env}")
+    
+    tag = _track_process(process)
+    with process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            _untrack_process(process, tag)
+    
+    if process.returncode != 0:
+        raise Exception(f"Error with {command[0]}: {stderr}\nOutput: {stdout}")
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def run_command_streaming(command: list, on_line: Callable[[str], None], cwd: str = None,
+                          timeout: int = None, env: Dict[str, str] = None) -> subprocess.CompletedProcess:
+    """
+    Run a command like run_command, handing each stdout line to `on_line` as it is printed.
+    
+    The returned CompletedProcess still carries the full stdout and stderr, and failures
+    raise the same exceptions as run_command.
+    """
+    command = _resolve_command(command)
+    
     try:
-        # Handle conda commands specially
-        if len(command) > 0 and 'conda' in command[0]:
-            # For conda commands, we might need shell=True on Windows
-            if os.name == 'nt':  # Windows
-                # Convert list to string for shell execution
-                command_str = ' '.join([shlex.quote(str(arg)) for arg in command])
-                return subprocess.run(command_str, check=True, capture_output=True, 
-                                    text=True, shell=True, creationflags=CREATE_NO_WINDOW, cwd=cwd, timeout=timeout)
-            else:
-                return subprocess.run(command, check=True, capture_output=True, 
-                                    text=True, creationflags=CREATE_NO_WINDOW, cwd=cwd, timeout=timeout)
-        else:
-            # Regular command execution
-            return subprocess.run(command, check=True, capture_output=True, 
-                                text=True, creationflags=CREATE_NO_WINDOW, cwd=cwd, timeout=timeout)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, bufsize=1, cwd=cwd, env=env, **_EXTRA_KW)
     except FileNotFoundError:
         path_env = os.environ.get('PATH', 'PATH not set')
         raise Exception(f"Command not found: '{command[0]}'. Working Dir: {os.getcwd()}. PATH: {path_env}")
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"Error with {command[0]}: {e.stderr}\nOutput: {e.stdout}")
+    tag = _track_process(process)
+    
+    # stderr is drained on its own thread so a chatty engine can't block on a full pipe
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_reader.start()
+    
+    timed_out = threading.Event()
+    def _kill():
+        timed_out.set()
+        process.kill()
+    timer = threading.Timer(timeout, _kill) if timeout else None
+    if timer:
+        timer.start()
+    
+    stdout_lines = []
+    try:
+        for line in process.stdout:
+            stdout_lines.append(line)
+            on_line(line)
+    except BaseException:
+        # A failing callback must not leave the engine running in the background
+        process.kill()
+        raise
+    finally:
+        returncode = process.wait()
+        _untrack_process(process, tag)
+        if timer:
+            timer.cancel()
+        stderr_reader.join()
+    
+    stdout = ''.join(stdout_lines)
+    stderr = ''.join(stderr_chunks)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output=stdout, stderr=stderr)
+    if returncode != 0:
+        raise Exception(f"Error with {command[0]}: {stderr}\nOutput: {stdout}")
+    return subprocess.CompletedProcess(command, returncode, stdout, stderr)
+
+
+# One concurrency gate per event loop, sized to the CPU count; created on first use
+_async_gates: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_async_gate() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    gate = _async_gates.get(loop)
+    if gate is None:
+        gate = _async_gates[loop] = asyncio.Semaphore(os.cpu_count() or 1)
+    return gate
 
 
-def validate_file_exists(filepath: str) -> bool:
-    """Validate that a file exists."""
-    return os.path.exists(filepath) and os.path.isfile(filepath)
+async def run_command_async(command: list, cwd: str = None, timeout: int = None,
+                            env: Dict[str, str] = None) -> subprocess.CompletedProcess:
+    """
+    Awaitable run_command: the process runs without blocking the event loop.
+    
+    At most os.cpu_count() commands run at once per event loop; further calls wait
+    their turn. Failures raise the same exceptions as run_command.
+    """
+    command = _resolve_command(command)
+    
+    async with _get_async_gate():
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=cwd, env=env, **_EXTRA_KW)
+        except FileNotFoundError:
+            path_env = os.environ.get('PATH', 'PATH not set')
+            raise Exception(f"Command not found: '{command[0]}'. Working Dir: {os.getcwd()}. PATH: {path_env}")
+        
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException as e:
+            # Timeouts and cancellation (e.g. a sibling failing inside gather) must not
+            # leave the engine running as an orphan
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            if isinstance(e, asyncio.TimeoutError):
+                raise subprocess.TimeoutExpired(command, timeout)
+            raise
+    
+    stdout = stdout.decode(errors='replace')
+    stderr = stderr.decode(errors='replace')
+    if process.returncode != 0:
+        raise Exception(f"Error with {command[0]}: {stderr}\nOutput: {stdout}")
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+# validate_file_exists answers reused under max_age: path -> (exists, monotonic time checked)
+_EXISTS_CACHE: Dict[str, tuple] = {}
+EXISTS_CACHE_SIZE = 10_000
+
+
+def validate_file_exists(filepath: str, max_age: float = 0) -> bool:
+    """
+    Validate that a file exists.
+    
+    With `max_age` (seconds), an answer for the same path from within that window is
+    reused instead of calling stat again; meant for UI code that re-checks the same
+    paths many times a second.
+    """
+    if max_age > 0:
+        now = time.monotonic()
+        cached = _EXISTS_CACHE.get(filepath)
+        if cached is not None and now - cached[1] < max_age:
+            return cached[0]
+    try:
+        exists = stat.S_ISREG(os.stat(filepath).st_mode)
+    except (OSError, ValueError):
+        exists = False
+    if max_age > 0:
+        if len(_EXISTS_CACHE) >= EXISTS_CACHE_SIZE:
+            _EXISTS_CACHE.clear()
+        _EXISTS_CACHE[filepath] = (exists, now)
+    return exists
+
+
+def validate_files_exist(filepaths: List[str]) -> List[bool]:
+    """Validate many files at once, reading each parent directory a single time."""
+    files_by_dir: Dict[str, set] = {}
+    for directory in {os.path.dirname(os.path.abspath(p)) for p in filepaths}:
+        try:
+            with os.scandir(directory) as entries:
+                files_by_dir[directory] = {os.path.normcase(e.name) for e in entries if e.is_file()}
+        except OSError:
+            files_by_dir[directory] = set()
+    
+    return [
+        os.path.normcase(os.path.basename(p)) in files_by_dir[os.path.dirname(os.path.abspath(p))]
+        for p in filepaths
+    ]
+
+
+def validate_dir(filepaths: Iterable[str]) -> Dict[str, bool]:
+    """validate_files_exist keyed by path, for callers filtering a whole ligand folder."""
+    filepaths = list(filepaths)
+    return dict(zip(filepaths, validate_files_exist(filepaths)))
 
 
 def get_filename_without_extension(filepath: str) -> str:
@@ -42,10 +309,21 @@ def get_filename_without_extension(filepath: str) -> str:
     return os.path.splitext(os.path.basename(filepath))[0]
 
 
+# Absolute paths create_directory has already made (or found). Work dirs get removed
+# again (batch runs rmtree theirs), so a hit is only trusted after one isdir check.
+_CREATED = set()
+
+
 def create_directory(dir_path: str) -> bool:
     """Create directory if it doesn't exist."""
+    path = os.path.abspath(dir_path)
+    if path in _CREATED:
+        if os.path.isdir(path):
+            return True
+        _CREATED.discard(path)
     try:
-        os.makedirs(dir_path, exist_ok=True)
-        return True
+        os.makedirs(path, exist_ok=True)
     except OSError:
-        return False
\ No newline at end of file
+        return False
+    _CREATED.add(path)
+    return True
\ No newline at end of file
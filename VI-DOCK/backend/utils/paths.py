@@ -1,6 +1,14 @@
 import sys
 import os
+from functools import lru_cache
 
+# PyInstaller creates a temp folder and stores path in _MEIPASS; a normal python
+# process looks relative to the working directory the app was started from.
+# Resolved once at import: the app never changes directory afterwards.
+_BASE_PATH = getattr(sys, '_MEIPASS', None) or os.path.abspath(".")
+
+
+@lru_cache(maxsize=256)
 def get_resource_path(relative_path: str) -> str:
     """
     Get absolute path to resource, works for dev and for PyInstaller.
@@ -11,12 +19,4 @@ def get_resource_path(relative_path: str) -> str:
     Returns:
         Absolute path to the resource
     """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        # Normal python process, look relative to current working directory
-        # or the script directory if we want to be safer
-        base_path = os.path.abspath(".")
-
-    return os.path.join(base_path, relative_path)
+    return os.path.join(_BASE_PATH, relative_path)